@@ -0,0 +1 @@
+"""Benchmarks for frd_client; run with `python -m benchmarks.run --help`."""
@@ -0,0 +1,153 @@
+"""
+Local stand-in for the FirstRate Data API, serving synthetic archives.
+
+Implements `data_file`, `meta_file`, `futures_contract` and `last_update`
+with ETag/304 and Range support, plus knobs for per-request latency and
+per-connection bandwidth so download-bound behaviour can be reproduced
+without the real service.
+"""
+import hashlib, io, threading, time, zipfile
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+
+STEPS = {"1min": "1min", "5min": "5min", "30min": "30min", "1hour": "1h", "1day": "1D"}
+
+def symbol_names(count: int) -> list:
+    """`3` -> `["SYMA", "SYMB", "SYMC"]`; stable across runs."""
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    names = []
+    for i in range(count):
+        suffix = ""
+        while True:
+            i, r = divmod(i, 26)
+            suffix = letters[r] + suffix
+            if not i:
+                break
+        names.append("SYM" + suffix)
+    return names
+
+def synthetic_bars(rows: int, timeframe: str = "1min", seed: int = 0) -> str:
+    """Headerless bar file text in the FirstRate layout: a random walk of `rows` bars."""
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2024-01-02 09:30", periods=rows, freq=STEPS[timeframe])
+    close = 100 + np.cumsum(rng.normal(0, 0.1, rows))
+    spread = np.abs(rng.normal(0, 0.05, rows))
+    df = pd.DataFrame({
+        "timestamp": ts, "open": close - spread / 2, "high": close + spread,
+        "low": close - spread, "close": close, "volume": rng.integers(1, 10_000, rows),
+    })
+    fmt = "%Y-%m-%d" if timeframe == "1day" else "%Y-%m-%d %H:%M:%S"
+    return df.to_csv(header=False, index=False, float_format="%.4f", date_format=fmt)
+
+@lru_cache(maxsize=32)
+def synthetic_archive(kind: str, symbols: int, rows: int, timeframe: str = "1min") -> bytes:
+    """
+    ZIP archive for an endpoint `kind`: one bar file per symbol for
+    `data_file`, one small text file per symbol for `meta_file`, and a
+    contract list for `futures_contract`.
+    """
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        for i, name in enumerate(symbol_names(symbols)):
+            if kind == "data_file":
+                z.writestr(f"{name}_{timeframe}.txt", synthetic_bars(rows, timeframe, seed=i))
+            elif kind == "meta_file":
+                z.writestr(f"{name}_meta.txt", f"ticker,{name}\nname,Synthetic {name}\n")
+        if kind == "futures_contract":
+            z.writestr("contracts.txt", "".join(f"{n},2024-03-15\n" for n in symbol_names(symbols)))
+    return buf.getvalue()
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        endpoint = url.path.rsplit("/", 1)[-1]
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if server.latency:
+            time.sleep(server.latency)
+        if endpoint == "last_update":
+            self._send(200, server.last_update.encode())
+            return
+        if endpoint not in ("data_file", "meta_file", "futures_contract"):
+            self._send(404, b"unknown endpoint")
+            return
+        timeframe = query.get("timeframe") or "1day"
+        body = synthetic_archive(endpoint, server.symbols, server.rows, timeframe)
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", {"ETag": etag})
+            return
+        rng = self.headers.get("Range")
+        if rng and self.headers.get("If-Range", etag) == etag:
+            start = int(rng[len("bytes="):].split("-")[0])
+            if start >= len(body):
+                self._send(416, b"")
+                return
+            self._send(206, body[start:], {"ETag": etag,
+                       "Content-Range": f"bytes {start}-{len(body) - 1}/{len(body)}"})
+            return
+        self._send(200, body, {"ETag": etag})
+
+    def _send(self, status, body, headers=None):
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.server.count(len(body))
+        if not self.server.bandwidth:
+            self.wfile.write(body)
+            return
+        chunk = 64 * 1024
+        for i in range(0, len(body), chunk):
+            piece = body[i:i + chunk]
+            self.wfile.write(piece)
+            time.sleep(len(piece) / self.server.bandwidth)
+
+class FakeFrdServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, symbols=10, rows=1_000, latency=0.0, bandwidth=None,
+                 last_update="2025-05-22", host="127.0.0.1", port=0):
+        """
+        Serve archives of `symbols` bar files of `rows` bars each. Every
+        request sleeps `latency` seconds first, and bodies are throttled to
+        `bandwidth` bytes per second per connection (unlimited if `None`).
+        Use as a context manager and point `FrdClient.BASE` at `url`.
+        """
+        super().__init__((host, port), _Handler)
+        self.symbols = symbols
+        self.rows = rows
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.last_update = last_update
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_port}/api"
+
+    def count(self, nbytes):
+        with self._lock:
+            self.requests += 1
+            self.bytes_sent += nbytes
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,170 @@
+"""
+Stage-by-stage benchmark of the download, extract, metadata, scheduler and
+load paths against a local `FakeFrdServer`:
+
+    python -m benchmarks.run --symbols 200 --rows 5000 --latency 0.05 --json bench.json
+
+Reports wall time, throughput and the peak RSS within each stage, sampled
+from `/proc/self/statm` (NaN where that is not available).
+"""
+import argparse, json, os, tempfile, threading, time
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from frd_client.client import FrdClient
+from frd_client.index import load_dataframe
+from frd_client.metadata import MetadataStore
+from frd_client.scheduler import UpdateScheduler
+from .fake_server import FakeFrdServer, synthetic_archive
+
+_PAGE_MB = os.sysconf("SC_PAGE_SIZE") / 2**20 if hasattr(os, "sysconf") else 0.0
+
+def rss_mb() -> float:
+    """Current resident set size, or NaN without `/proc`."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * _PAGE_MB
+    except (OSError, IndexError, ValueError):
+        return float("nan")
+
+class RssSampler:
+    """Peak RSS between `start()` and `stop()`, sampled every `interval` seconds on a thread."""
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = float("nan")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        current = rss_mb()
+        if not current <= self.peak:   # also replaces the initial NaN
+            self.peak = current
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+        return self.peak
+
+class Stage:
+    def __init__(self, name):
+        self.name = name
+        self.wall = 0.0
+        self.bytes = 0
+        self.rows = 0
+        self.items = 0
+        self.peak_rss = float("nan")
+
+    def as_dict(self) -> dict:
+        wall = self.wall or float("nan")
+        return {"stage": self.name, "wall_s": round(self.wall, 4), "items": self.items,
+                "bytes": self.bytes, "rows": self.rows,
+                "items_per_s": round(self.items / wall, 1),
+                "mb_per_s": round(self.bytes / 2**20 / wall, 2),
+                "rows_per_s": round(self.rows / wall),
+                "peak_rss_mb": round(self.peak_rss, 1)}
+
+@contextmanager
+def stage(results, name):
+    s = Stage(name)
+    sampler = RssSampler()
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        yield s
+    finally:
+        s.wall = time.perf_counter() - start
+        s.peak_rss = sampler.stop()
+    results.append(s.as_dict())
+
+def run(work_dir: Path, symbols=50, rows=1_000, timeframe="1min", latency=0.0,
+        bandwidth=None, max_workers=4) -> list:
+    """Run every stage in `work_dir` and return one result dict per stage."""
+    work_dir = Path(work_dir)
+    results = []
+    params = {"type": "stock", "period": "full", "ticker_range": "A-Z",
+              "timeframe": timeframe, "adjustment": "adj_split"}
+    # build the archives up front so generation is not timed as download
+    for kind, tf in (("data_file", timeframe), ("data_file", "1day"), ("meta_file", "1day"),
+                     ("futures_contract", "1day")):
+        synthetic_archive(kind, symbols, rows, tf)
+    with FakeFrdServer(symbols, rows, latency, bandwidth) as server:
+        meta = MetadataStore(work_dir / "metadata.db")
+        client = FrdClient("bench", work_dir, pool_size=max_workers * 2, meta=meta)
+        client.BASE = server.url
+        dest = work_dir / "stock" / "full" / "A-Z"
+
+        with stage(results, "download") as s:
+            part = client._download_archive("data_file", dict(params))
+            s.bytes, s.items = part.stat().st_size, 1
+        with stage(results, "extract") as s:
+            paths = client._extract(part, dest)
+            s.items = len(paths)
+            s.bytes = sum(p.stat().st_size for p in paths)
+            s.rows = symbols * rows
+        with stage(results, "fetch_zip_unchanged") as s:
+            s.items = len(client.fetch_zip("data_file", dict(params), dest))
+        with stage(results, "manifest_write") as s:
+            s.items = meta.record_files("stock", paths, timeframe)
+            s.rows = symbols * rows
+        with stage(results, "set_update") as s:
+            for i in range(1_000):
+                meta.set_update("bench", f"p{i % 10}", date(2024, 1, 1 + i % 28))
+            s.items = 1_000
+        with stage(results, "set_update_batched") as s:
+            with meta.batch():
+                for i in range(1_000):
+                    meta.set_update("bench", f"p{i % 10}", date(2024, 1, 1 + i % 28))
+            s.items = 1_000
+
+        sent = server.bytes_sent
+        with stage(results, "scheduler_run_daily") as s:
+            run_results = UpdateScheduler(client, meta, max_workers=max_workers).run_daily()
+            s.items = sum(r.status == "ran" for r in run_results)
+            s.bytes = server.bytes_sent - sent
+        with stage(results, "load_dataframe") as s:
+            # the scheduler fetched 1day bars with its default adjustment
+            df = load_dataframe(client, meta, "stock", "day", "1day", adjustment="adj_splitdiv",
+                                max_workers=max_workers)
+            s.rows, s.items = len(df), df["symbol"].nunique()
+            s.bytes = int(df.memory_usage(deep=True).sum())
+        meta.close()
+    return results
+
+def report(results) -> str:
+    cols = ["stage", "wall_s", "items", "items_per_s", "mb_per_s", "rows_per_s", "peak_rss_mb"]
+    widths = [max(len(c), *(len(str(r[c])) for r in results)) for c in cols]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(cols, widths))]
+    lines += ["  ".join(str(r[c]).ljust(w) for c, w in zip(cols, widths)) for r in results]
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--rows", type=int, default=1_000, help="bars per symbol file")
+    parser.add_argument("--timeframe", default="1min")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes/s per connection")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--work-dir", type=Path, default=None, help="default: a temporary directory")
+    parser.add_argument("--json", type=Path, default=None, help="also write the results here")
+    args = parser.parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.work_dir or Path(tmp), args.symbols, args.rows, args.timeframe,
+                      args.latency, args.bandwidth, args.workers)
+    print(report(results))
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+    return results
+
+if __name__ == "__main__":
+    main()
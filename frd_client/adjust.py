@@ -0,0 +1,220 @@
+"""
+Local split/dividend adjustment of unadjusted bars.
+
+Corporate actions (`symbol, date, type, value` with `type` "split", the
+new/old share ratio, or "dividend", the cash amount) are kept in
+`MetadataStore`'s `actions` table and turned into backward adjustment
+factors at read time:
+
+* a split of ratio r divides earlier prices by r and multiplies earlier
+  volumes by r;
+* a dividend d multiplies earlier prices by `1 - d / close`, where `close`
+  is the last unadjusted close before the ex-date.
+
+That reference close is stored with the dividend the first time bars
+spanning its ex-date pass through (an adjusted read, or an unadjusted
+`data_file` download seen by `on_extract`), so any later slice of the
+history is adjusted with the same factor as the full series.
+
+Factors apply to bars strictly before the ex-date, so one unadjusted
+download serves raw, `adj_split` and `adj_splitdiv` reads.
+"""
+import threading
+from pathlib import Path, PurePath
+import numpy as np
+import pandas as pd
+from .parsing import read_bars, symbol_from_name
+from .series import BarSeries
+
+RAW = "UNADJUSTED"
+MODES = {
+    RAW: (),
+    "adj_split": ("split",),
+    "adj_splitdiv": ("split", "dividend"),
+}
+ACTION_COLUMNS = ["symbol", "date", "type", "value"]
+
+def read_actions(path) -> pd.DataFrame:
+    """
+    Parse an actions file into `ACTION_COLUMNS`. Accepts `symbol,date,type,value`
+    rows (header optional) or per-symbol `<SYMBOL>_splits.txt` /
+    `<SYMBOL>_dividends.txt` files of `date,value` rows.
+    """
+    stem = PurePath(path).stem.lower()
+    kind = "split" if stem.endswith("_splits") else "dividend" if stem.endswith("_dividends") else None
+    with open(path) as fh:
+        first = fh.readline().strip().lower()
+    if kind is not None:
+        header = None if first[:1].isdigit() else 0
+        df = pd.read_csv(path, header=header, names=["date", "value"], usecols=[0, 1])
+        df.insert(0, "symbol", symbol_from_name(PurePath(path).name))
+        df.insert(2, "type", kind)
+    else:
+        header = 0 if first.startswith("symbol,") else None
+        df = pd.read_csv(path, header=header, names=ACTION_COLUMNS, usecols=[0, 1, 2, 3])
+        df["type"] = df["type"].str.lower().str.rstrip("s")
+    df["date"] = pd.to_datetime(df["date"]).dt.strftime("%Y-%m-%d")
+    return df[df["type"].isin(("split", "dividend"))].reset_index(drop=True)
+
+def is_actions_file(path) -> bool:
+    stem = PurePath(path).stem.lower()
+    return stem.endswith(("_splits", "_dividends", "_actions")) or stem == "actions"
+
+class AdjustmentEngine:
+    def __init__(self, meta):
+        """
+        Apply the actions recorded in `meta` (a `MetadataStore`). Per-symbol
+        event arrays are cached and rebuilt only for symbols whose actions
+        change through `add_actions`.
+        """
+        self.meta = meta
+        self._events = {}
+        self._lock = threading.Lock()
+
+    def add_actions(self, actions: pd.DataFrame) -> set:
+        """Record new or revised actions; returns the symbols whose factors changed."""
+        changed = self.meta.record_actions(actions[ACTION_COLUMNS].itertuples(index=False, name=None))
+        with self._lock:
+            for symbol in changed:
+                self._events.pop(symbol, None)
+        return changed
+
+    def load_file(self, path) -> set:
+        return self.add_actions(read_actions(path))
+
+    def on_extract(self, endpoint, params, paths):
+        """
+        `FrdClient.extract_hooks` adapter: pick up actions files from
+        `meta_file` archives, and dividend reference closes from unadjusted
+        `data_file` archives.
+        """
+        if endpoint == "meta_file":
+            for path in paths:
+                if is_actions_file(path) and Path(path).stat().st_size:
+                    self.load_file(path)
+        elif endpoint == "data_file" and (params.get("adjustment") or RAW) == RAW:
+            for path in paths:
+                symbol = symbol_from_name(Path(path).name)
+                dates, _, dividend, ref = self.events(symbol)
+                if Path(path).stat().st_size and np.any((dividend > 0) & np.isnan(ref)):
+                    df = read_bars(path, usecols=["timestamp", "close"])
+                    self.references(symbol, df["timestamp"].to_numpy().astype("datetime64[ns]").view("int64"),
+                                    df["close"].to_numpy())
+
+    def events(self, symbol):
+        """
+        `(ex_dates_ns, split_ratios, dividends, reference_closes)` for
+        `symbol`, sorted by date; unknown reference closes are NaN.
+        """
+        with self._lock:
+            hit = self._events.get(symbol)
+        if hit is not None:
+            return hit
+        rows = self.meta.get_actions([symbol])
+        dates = np.array([pd.Timestamp(d).value for _, d, _, _, _ in rows], dtype="int64")
+        split = np.array([v if t == "split" else 1.0 for _, _, t, v, _ in rows], dtype="float64")
+        dividend = np.array([v if t == "dividend" else 0.0 for _, _, t, v, _ in rows], dtype="float64")
+        ref = np.array([np.nan if r is None else r for _, _, _, _, r in rows], dtype="float64")
+        hit = (dates, split, dividend, ref)
+        with self._lock:
+            self._events[symbol] = hit
+        return hit
+
+    def references(self, symbol, timestamp, close) -> np.ndarray:
+        """
+        Reference closes of `symbol`'s events, recording those of dividends
+        whose ex-date the unadjusted bars (`timestamp`, `close`) span. Those
+        still unknown fall back to the last close before the ex-date among
+        these bars (NaN if there is none).
+        """
+        dates, _, dividend, ref = self.events(symbol)
+        missing = (dividend > 0) & np.isnan(ref)
+        if not missing.any():
+            return ref
+        timestamp = np.asarray(timestamp, dtype="int64")
+        close = np.asarray(close, dtype="float64")
+        prev = np.searchsorted(timestamp, dates, "left") - 1
+        # the bar before the ex-date is only known to be the last one if a later bar follows it
+        spans = missing & (prev >= 0) & (prev + 1 < len(timestamp))
+        ref = ref.copy()
+        if spans.any():
+            ref[spans] = close[prev[spans]]
+            self.meta.set_reference_closes(
+                (symbol, str(np.datetime64(int(d), "ns"))[:10], float(r))
+                for d, r in zip(dates[spans], ref[spans]))
+            with self._lock:
+                self._events.pop(symbol, None)
+        guess = missing & ~spans & (prev >= 0)
+        ref[guess] = close[prev[guess]]
+        return ref
+
+    def factors(self, symbol, timestamp, close, mode: str = "adj_splitdiv"):
+        """
+        Per-bar `(price_factor, volume_factor)` for unadjusted bars of
+        `symbol` (int64 ns `timestamp`, sorted, with their `close`), or
+        `None` if nothing applies.
+        """
+        kinds = MODES[mode]
+        dates, split, dividend, _ = self.events(symbol)
+        if not kinds or len(dates) == 0:
+            return None
+        timestamp = np.asarray(timestamp, dtype="int64")
+        price = 1.0 / split if "split" in kinds else np.ones(len(dates))
+        if "dividend" in kinds:
+            ref = self.references(symbol, timestamp, close)
+            known = (dividend > 0) & ~np.isnan(ref)
+            price = price * np.where(known, 1.0 - dividend / np.where(known, ref, 1.0), 1.0)
+        volume = split if "split" in kinds else np.ones(len(dates))
+        # cumulative product of every event after the bar; index len(dates) means none
+        cum_price = np.append(np.cumprod(price[::-1])[::-1], 1.0)
+        cum_volume = np.append(np.cumprod(volume[::-1])[::-1], 1.0)
+        idx = np.searchsorted(dates, timestamp, "right")
+        return cum_price[idx], cum_volume[idx]
+
+    def adjust(self, series: BarSeries, symbol, mode: str = "adj_splitdiv") -> BarSeries:
+        """Adjusted copy of an unadjusted `BarSeries` (returned as-is if nothing applies)."""
+        f = self.factors(symbol, series.timestamp, series.close, mode)
+        if f is None:
+            return series
+        price, volume = f
+        def scale(arr, factor):
+            arr = np.asarray(arr)
+            out = arr * factor
+            return np.rint(out).astype(arr.dtype) if arr.dtype.kind in "iu" else out.astype(arr.dtype)
+        return BarSeries(series.timestamp, *(scale(getattr(series, p), price)
+                                             for p in ("open", "high", "low", "close")),
+                         scale(series.volume, volume))
+
+    def adjust_frame(self, df: pd.DataFrame, mode: str = "adj_splitdiv", symbol=None) -> pd.DataFrame:
+        """
+        Adjust a `read_bars`/`load_dataframe` frame of unadjusted bars. Rows
+        are grouped by the `symbol` column (or all belong to `symbol`) and
+        must be time-sorted within each symbol; symbols without actions
+        are left untouched.
+        """
+        if not MODES[mode] or df.empty or "close" not in df:
+            return df
+        if symbol is not None:
+            groups = {symbol: np.arange(len(df))}
+        else:
+            groups = df.groupby("symbol", observed=True).indices
+        ts = df["timestamp"].to_numpy().astype("datetime64[ns]").view("int64")
+        close = df["close"].to_numpy()
+        price = np.ones(len(df))
+        volume = np.ones(len(df))
+        touched = False
+        for sym, rows in groups.items():
+            f = self.factors(sym, ts[rows], close[rows], mode)
+            if f is not None:
+                price[rows], volume[rows] = f
+                touched = True
+        if not touched:
+            return df
+        df = df.copy()
+        for p in ("open", "high", "low", "close"):
+            if p in df:
+                df[p] = (df[p].to_numpy() * price).astype(df[p].dtype)
+        if "volume" in df:
+            scaled = df["volume"].to_numpy() * volume
+            df["volume"] = np.rint(scaled).astype(df["volume"].dtype) if df["volume"].dtype.kind in "iu" else scaled
+        return df
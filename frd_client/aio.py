@@ -0,0 +1,281 @@
+"""
+Asyncio variants of `FrdClient`, the instrument handlers and `UpdateScheduler`.
+
+Requires the optional `aiohttp` dependency (`pip install frd_client[async]`).
+"""
+import asyncio, logging, sys, time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - optional dependency
+    aiohttp = None
+
+from .client import FrdClient, RETRY_STATUS
+from .instruments.stock import StockHandler
+from .instruments.etf import EtfHandler
+from .instruments.futures import FuturesHandler
+from .instruments.index import IndexHandler
+from .instruments.fx import FxHandler
+from .instruments.crypto import CryptoHandler
+from .leases import LeaseLost
+from .scheduler import UpdateScheduler, RunResult
+
+log = logging.getLogger(__name__)
+
+class AsyncFrdClient(FrdClient):
+    """
+    Non-blocking `FrdClient`: `_get`, `download` and `fetch_zip` are
+    coroutines (and `iter_batches` an async generator) sharing one
+    `aiohttp.ClientSession` of at most `pool_size` connections. ZIP extraction runs in the default executor so it never
+    blocks the event loop. Use as an async context manager, or call `close()`.
+    """
+    def __init__(self, userid: str, work_dir: Path, pool_size: int = 100,
+                 retries: int = 3, backoff: float = 0.5, session=None, meta=None, metrics=None):
+        if aiohttp is None:
+            raise ImportError("AsyncFrdClient requires aiohttp: pip install frd_client[async]")
+        super().__init__(userid, work_dir, retries=retries, backoff=backoff, meta=meta, metrics=metrics)
+        self.pool_size = pool_size
+        self.session = session
+
+    def _session(self):
+        # created lazily so it binds to the loop that actually runs the requests
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=aiohttp.ClientTimeout(total=None, sock_read=60, sock_connect=60))
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _request(self, endpoint: str, params: dict, headers: dict = None):
+        params["userid"] = self.userid
+        # aiohttp rejects None values that requests silently drops
+        query = {k: v for k, v in params.items() if v is not None}
+        for attempt in range(self.retries + 1):
+            try:
+                r = await self._session().get(f"{self.BASE}/{endpoint}", params=query, headers=headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+                self.metrics.count("retries", endpoint=endpoint)
+                await asyncio.sleep(self._delay(attempt))
+                continue
+            if r.status not in RETRY_STATUS or attempt == self.retries:
+                return r
+            r.release()
+            self.metrics.count("retries", endpoint=endpoint)
+            await asyncio.sleep(self._delay(attempt, r.headers.get("Retry-After")))
+
+    async def _get(self, endpoint: str, params: dict) -> bytes:
+        with self.metrics.timer("request", endpoint=endpoint, asset_type=params.get("type")):
+            async with await self._request(endpoint, params) as r:
+                r.raise_for_status()
+                content = await r.read()
+        self.metrics.count("response_bytes", len(content), endpoint=endpoint, asset_type=params.get("type"))
+        return content
+
+    async def download(self, endpoint: str, params: dict, path: Path, record: dict = None):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        offset = path.stat().st_size if path.exists() else 0
+        headers = self._download_headers(path, offset, record)
+        async with await self._request(endpoint, params, headers) as r:
+            if r.status == 304:
+                return None
+            if offset and r.status == 416:
+                return path
+            r.raise_for_status()
+            if r.status != 206:
+                offset = 0
+                self._save_validators(path, r.headers)
+            with open(path, "r+b" if offset else "wb") as fh:
+                fh.seek(offset)
+                fh.truncate()
+                async for chunk in r.content.iter_chunked(self.CHUNK_SIZE):
+                    fh.write(chunk)
+        return path
+
+    async def _download_archive(self, endpoint: str, params: dict, record: dict = None):
+        part = self._partial_path(endpoint, params)
+        for attempt in range(self.retries + 1):
+            try:
+                return await self.download(endpoint, params, part, record)
+            except (aiohttp.ClientPayloadError, aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if attempt == self.retries:
+                    raise
+                await asyncio.sleep(self._delay(attempt))
+
+    async def fetch_zip(self, endpoint: str, params: dict, dest: Path, lease=None):
+        dest.mkdir(parents=True, exist_ok=True)
+        tags = {"endpoint": endpoint, "asset_type": params.get("type"), "period": params.get("period")}
+        loop = asyncio.get_running_loop()
+        # stats every recorded member: keep it off the loop
+        record = await loop.run_in_executor(None, self._archive_record, endpoint, params, dest)
+        with self.metrics.timer("download", **tags):
+            part = await self._download_archive(endpoint, params, record)
+        if part is None:
+            self.metrics.count("not_modified", **tags)
+            return []
+        self.metrics.count("download_bytes", part.stat().st_size, **tags)
+        if lease is not None:
+            lease.check()
+        def extract():
+            with self.metrics.timer("extract", **tags):
+                paths = self._extract(part, dest)
+            self.metrics.count("extracted_files", len(paths), **tags)
+            with self.metrics.timer("extract_hooks", **tags):
+                self._after_extract(endpoint, params, paths)
+            return paths
+        return await loop.run_in_executor(None, extract)
+
+    async def iter_batches(self, endpoint: str, params: dict, batch_size: int = 100_000, dest: Path = None):
+        """
+        Async generator form of `FrdClient.iter_batches`: the archive is
+        downloaded on the loop, and each batch is parsed in the default
+        executor.
+        """
+        part = await self._download_archive(endpoint, params)
+        loop = asyncio.get_running_loop()
+        batches = self._iter_archive(endpoint, params, part, batch_size, dest)
+        done = object()
+        try:
+            while True:
+                batch = await loop.run_in_executor(None, next, batches, done)
+                if batch is done:
+                    break
+                yield batch
+        finally:
+            batches.close()
+
+class AsyncHandlerMixin:
+    """
+    Turns an `InstrumentHandler` subclass into a coroutine-based handler that
+    reuses its `full_requests`/`update_requests` and `remote_cache`. The
+    archives of one call are fetched concurrently, and metadata writes run
+    in the default executor.
+    """
+    async def last_remote_update(self, full: bool=False):
+        key = (self.asset_type, full)
+        remote = self.remote_cache.get(key)
+        if remote is None:
+            remote = self._parse_remote(await self.client._get("last_update", self._remote_params(full)))
+            self.remote_cache.set(key, remote)
+        return remote
+
+    async def needs_update(self, period: str) -> bool:
+        return self._is_stale(await self.last_remote_update(full=False), period)
+
+    async def download_full(self, *args, lease=None, **kwargs):
+        key, requests = self.full_requests(*args, **kwargs)
+        with self.metrics.timer("handler_download", asset_type=self.asset_type, period="full"):
+            await asyncio.gather(*(self.client.fetch_zip(**r, lease=lease) for r in requests))
+            if lease is not None:
+                lease.check()
+            remote = await self.last_remote_update(full=True)
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.meta.set_full, self.asset_type, key, remote)
+
+    async def download_update(self, period: str, *args, lease=None, **kwargs):
+        requests = self.update_requests(period, *args, **kwargs)
+        with self.metrics.timer("handler_download", asset_type=self.asset_type, period=period):
+            await asyncio.gather(*(self.client.fetch_zip(**r, lease=lease) for r in requests))
+            if lease is not None:
+                lease.check()
+            remote = await self.last_remote_update(full=False)
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.meta.set_update, self.asset_type, period, remote)
+
+class AsyncStockHandler(AsyncHandlerMixin, StockHandler): pass
+class AsyncEtfHandler(AsyncHandlerMixin, EtfHandler): pass
+class AsyncFuturesHandler(AsyncHandlerMixin, FuturesHandler): pass
+class AsyncIndexHandler(AsyncHandlerMixin, IndexHandler): pass
+class AsyncFxHandler(AsyncHandlerMixin, FxHandler): pass
+class AsyncCryptoHandler(AsyncHandlerMixin, CryptoHandler): pass
+
+class AsyncUpdateScheduler(UpdateScheduler):
+    """
+    `UpdateScheduler` whose runs are coroutines: all handlers probe and
+    download on the running loop, with at most `max_downloads` downloads
+    in flight (unbounded if `None`).
+    """
+    HANDLERS = {
+      "stock": AsyncStockHandler,
+      "etf": AsyncEtfHandler,
+      "futures": AsyncFuturesHandler,
+      "index": AsyncIndexHandler,
+      "fx": AsyncFxHandler,
+      "crypto": AsyncCryptoHandler,
+    }
+
+    def __init__(self, client, meta, max_downloads=None, remote_ttl=300, adjustment=None,
+                 leases=None):
+        super().__init__(client, meta, max_downloads=max_downloads, remote_ttl=remote_ttl,
+                         adjustment=adjustment, leases=leases)
+        self.max_downloads = max_downloads
+
+    @asynccontextmanager
+    async def _async_lease(self, asset_type, period):
+        """
+        `_lease` with its blocking parts (acquiring in a SQLite write
+        transaction, joining the heartbeat on release) run in the executor.
+        """
+        loop = asyncio.get_running_loop()
+        lease = self._lease(asset_type, period)
+        held = await loop.run_in_executor(None, lease.__enter__)
+        try:
+            yield held
+        except BaseException:
+            if not await loop.run_in_executor(None, lease.__exit__, *sys.exc_info()):
+                raise
+        else:
+            await loop.run_in_executor(None, lease.__exit__, None, None, None)
+
+    async def prefetch_remote_updates(self, full=False):
+        async def probe(t, h):
+            try:
+                return t, await h.last_remote_update(full=full)
+            except Exception:
+                log.warning("%s last_update probe failed", t, exc_info=True)
+                return t, None
+        found = await asyncio.gather(*(probe(t, h) for t, h in self.handlers.items()))
+        return {t: d for t, d in found if d is not None}
+
+    async def _update(self, asset_type, handler, period, downloads):
+        start = time.perf_counter()
+        try:
+            if not await handler.needs_update(period):
+                return RunResult(asset_type, period, "skipped", time.perf_counter() - start)
+            async with self._async_lease(asset_type, period) as held:
+                if held is None:
+                    return RunResult(asset_type, period, "leased", time.perf_counter() - start)
+                if self.leases is not None and not await handler.needs_update(period):
+                    return RunResult(asset_type, period, "skipped", time.perf_counter() - start)
+                lease = None if self.leases is None else held
+                async with downloads:
+                    await handler.download_update(period=period, lease=lease, **self.update_kwargs(asset_type))
+        except LeaseLost:
+            log.warning("%s %s lease lost; left to the runner that took it over", asset_type, period)
+            return RunResult(asset_type, period, "leased", time.perf_counter() - start)
+        except Exception as e:
+            log.exception("%s %s update failed", asset_type, period)
+            return RunResult(asset_type, period, "failed", time.perf_counter() - start, e)
+        return RunResult(asset_type, period, "ran", time.perf_counter() - start)
+
+    async def _run(self, period):
+        with self.metrics.profiled(f"run_{period}"), self.metrics.timer("run", period=period):
+            self.remote_cache.clear()
+            with self.metrics.timer("probe", period=period):
+                await self.prefetch_remote_updates()
+            downloads = asyncio.Semaphore(self.max_downloads or len(self.handlers) or 1)
+            return self._record(list(await asyncio.gather(
+                *(self._update(t, h, period, downloads) for t, h in self.handlers.items()))))
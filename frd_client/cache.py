@@ -0,0 +1,106 @@
+"""
+Result cache for `load_dataframe`.
+
+Entries are keyed by everything that selects a dataset (asset type, period,
+timeframe, handler arguments such as tickers and adjustment, and the
+symbol/time/column filters) and stamped with the `MetadataStore` date of
+that asset type and period. A later `set_update` for the same key changes
+the stamp, so only the entries built from the replaced download go stale.
+"""
+import hashlib, os, pickle, threading
+from collections import OrderedDict
+from pathlib import Path
+import pandas as pd
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_freeze(v) for v in value]
+        return tuple(sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items)
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+def cache_key(asset_type, period, timeframe, **selection) -> tuple:
+    """Hashable key; `selection` holds the remaining `load_dataframe` arguments."""
+    return (asset_type, period, timeframe, _freeze({k: v for k, v in selection.items() if v is not None}))
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+class ResultCache:
+    def __init__(self, max_bytes: int = 512 * 2**20, disk_dir: Path = None):
+        """
+        Keep loaded frames in memory up to `max_bytes` in total, evicting the
+        least recently used. With `disk_dir` every entry is also pickled
+        there, so a new process starts warm.
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = None if disk_dir is None else Path(disk_dir)
+        self.bytes = 0
+        self._entries = OrderedDict()  # key -> (version, frame, nbytes)
+        self._lock = threading.Lock()
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _disk_path(self, key) -> Path:
+        return self.disk_dir / (hashlib.sha1(repr(key).encode()).hexdigest() + ".pkl")
+
+    def _store(self, key, version, df):
+        nbytes = frame_bytes(df)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            if nbytes > self.max_bytes:
+                return
+            self._entries[key] = (version, df, nbytes)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                _, (_, _, n) = self._entries.popitem(last=False)
+                self.bytes -= n
+
+    def get(self, key, version):
+        """The cached frame for `key` at `version`, or `None`; stale entries are dropped."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self._entries.move_to_end(key)
+                    return entry[1].copy(deep=False)
+                del self._entries[key]
+                self.bytes -= entry[2]
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as fh:
+                disk_key, disk_version, df = pickle.load(fh)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if disk_key != key or disk_version != version:
+            path.unlink(missing_ok=True)
+            return None
+        self._store(key, version, df)
+        return df.copy(deep=False)
+
+    def put(self, key, version, df: pd.DataFrame):
+        self._store(key, version, df)
+        if self.disk_dir is not None:
+            path = self._disk_path(key)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with open(tmp, "wb") as fh:
+                pickle.dump((key, version, df), fh, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+        if self.disk_dir is not None:
+            for path in self.disk_dir.glob("*.pkl"):
+                path.unlink(missing_ok=True)
@@ -1,22 +1,334 @@
-import requests, zipfile, io
+import requests, zipfile, io, hashlib, json, os, random, shutil, time, uuid
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from .metrics import NULL_METRICS
+from .parsing import read_bars
+
+# responses worth another attempt: rate limiting and transient server errors
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# errors raised for dropped or reset connections, including mid-body
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout,
+                requests.exceptions.ChunkedEncodingError)
 
 class FrdClient:
     BASE = "https://firstratedata.com/api"
-    def __init__(self, userid: str, work_dir: Path):
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, userid: str, work_dir: Path, stream: bool = True,
+                 pool_size: int = 10, retries: int = 3, backoff: float = 0.5,
+                 session: requests.Session = None, meta=None, metrics=None):
+        """
+        With `stream=True` (the default) archives are written to disk in
+        `CHUNK_SIZE` pieces and extracted from there, so memory stays flat
+        regardless of archive size. `stream=False` keeps the old in-memory path.
+
+        All requests share one keep-alive `session` holding up to `pool_size`
+        connections per host; a `session` passed in keeps its own adapters.
+        Connection errors and `RETRY_STATUS` responses are retried `retries`
+        times with full-jitter exponential backoff starting at `backoff` seconds.
+
+        Given a `MetadataStore` as `meta`, archives are fetched with
+        conditional requests (ETag / Last-Modified) and only members whose
+        ZIP CRC32 or size changed since the last extraction are written.
+
+        `metrics` (a `Metrics`) receives request, download and extract timers
+        and byte counts tagged by endpoint and asset type.
+        """
         self.userid = userid
         self.work_dir = work_dir
+        self.stream = stream
+        self.retries = retries
+        self.backoff = backoff
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        # a caller-supplied session keeps its own adapters (retries, pools, certificates)
+        self.session = session
+        # callables run after every fetch_zip as hook(endpoint, params, paths)
+        self.extract_hooks = []
+        self.meta = meta
+        self.metrics = metrics or NULL_METRICS
         work_dir.mkdir(parents=True, exist_ok=True)
 
-    def _get(self, endpoint: str, params: dict) -> bytes:
+    def _delay(self, attempt: int, retry_after: str = None) -> float:
+        delay = random.uniform(0, self.backoff * 2 ** attempt)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        return delay
+
+    def _sleep(self, attempt: int, retry_after: str = None):
+        time.sleep(self._delay(attempt, retry_after))
+
+    def _request(self, endpoint: str, params: dict, **kwargs) -> requests.Response:
+        """GET `endpoint` through the pooled session, retrying transient failures."""
         params["userid"] = self.userid
-        r = requests.get(f"{self.BASE}/{endpoint}", params=params, timeout=60)
-        r.raise_for_status()
-        return r.content
+        for attempt in range(self.retries + 1):
+            try:
+                r = self.session.get(f"{self.BASE}/{endpoint}", params=params,
+                                     timeout=60, **kwargs)
+            except RETRY_ERRORS:
+                if attempt == self.retries:
+                    raise
+                self.metrics.count("retries", endpoint=endpoint)
+                self._sleep(attempt)
+                continue
+            if r.status_code not in RETRY_STATUS or attempt == self.retries:
+                return r
+            r.close()
+            self.metrics.count("retries", endpoint=endpoint)
+            self._sleep(attempt, r.headers.get("Retry-After"))
+
+    def _get(self, endpoint: str, params: dict) -> bytes:
+        with self.metrics.timer("request", endpoint=endpoint, asset_type=params.get("type")):
+            r = self._request(endpoint, params)
+            r.raise_for_status()
+            content = r.content
+        self.metrics.count("response_bytes", len(content), endpoint=endpoint, asset_type=params.get("type"))
+        return content
+
+    def _partial_path(self, endpoint: str, params: dict) -> Path:
+        """Stable on-disk location for a (possibly interrupted) download."""
+        query = "&".join(f"{k}={params[k]}" for k in sorted(params) if k != "userid")
+        digest = hashlib.sha1(f"{endpoint}?{query}".encode()).hexdigest()
+        return self.work_dir / ".partial" / f"{digest}.zip"
+
+    @staticmethod
+    def _validators_path(path: Path) -> Path:
+        return path.with_name(path.name + ".json")
+
+    def _download_headers(self, path: Path, offset: int, record: dict = None) -> dict:
+        """Range/If-Range for a resume, otherwise If-None-Match/If-Modified-Since from `record`."""
+        if offset:
+            headers = {"Range": f"bytes={offset}-"}
+            sidecar = self._validators_path(path)
+            if sidecar.exists():
+                saved = json.loads(sidecar.read_text())
+                # the remainder only fits if the file is still the same version
+                validator = saved.get("etag") or saved.get("last_modified")
+                if validator:
+                    headers["If-Range"] = validator
+            return headers
+        headers = {}
+        if record and record.get("etag"):
+            headers["If-None-Match"] = record["etag"]
+        if record and record.get("last_modified"):
+            headers["If-Modified-Since"] = record["last_modified"]
+        return headers
+
+    def _save_validators(self, path: Path, headers):
+        self._validators_path(path).write_text(json.dumps({
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+        }))
 
-    def fetch_zip(self, endpoint: str, params: dict, dest: Path):
-        raw = self._get(endpoint, params)
-        z = zipfile.ZipFile(io.BytesIO(raw))
+    def download(self, endpoint: str, params: dict, path: Path, record: dict = None):
+        """
+        Stream `endpoint` into `path`. If `path` already holds the head of the
+        file from an earlier, interrupted call, only the remainder is requested
+        with an HTTP Range header. Servers that ignore the range answer 200 and
+        the file is rewritten from the start.
+
+        `record` holds the validators of the last extracted copy; if the server
+        answers 304 Not Modified nothing is written and `None` is returned.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        offset = path.stat().st_size if path.exists() else 0
+        headers = self._download_headers(path, offset, record)
+        with self._request(endpoint, params, headers=headers, stream=True) as r:
+            if r.status_code == 304:
+                return None
+            if offset and r.status_code == 416:
+                # nothing left to send: the partial file is already complete
+                return path
+            r.raise_for_status()
+            if r.status_code != 206:
+                offset = 0
+                self._save_validators(path, r.headers)
+            with open(path, "r+b" if offset else "wb") as fh:
+                fh.seek(offset)
+                fh.truncate()
+                for chunk in r.iter_content(chunk_size=self.CHUNK_SIZE):
+                    fh.write(chunk)
+        return path
+
+    def _archive_record(self, endpoint: str, params: dict, dest: Path):
+        """
+        Validators for a conditional request, or `None` if any member recorded
+        under `dest` is gone: a 304 would leave the missing files missing.
+        """
+        if self.meta is None:
+            return None
+        record = self.meta.get_archive(self._partial_path(endpoint, params).stem)
+        if record is None:
+            return None
+        members = self.meta.get_members(dest.resolve())
+        return record if members and all(os.path.exists(p) for p in members) else None
+
+    def fetch_zip(self, endpoint: str, params: dict, dest: Path, lease=None):
+        """
+        Download and extract an archive into `dest`. Returns the paths that
+        were (re)written, which are also passed to `extract_hooks`; an
+        unchanged archive or member is not written again. With a
+        `leases.Lease` as `lease`, `LeaseLost` is raised instead of
+        extracting if the lease was taken over during the download.
+        """
         dest.mkdir(parents=True, exist_ok=True)
-        for member in z.namelist():
-            z.extract(member, path=dest)
\ No newline at end of file
+        tags = {"endpoint": endpoint, "asset_type": params.get("type"), "period": params.get("period")}
+        if not self.stream:
+            with self.metrics.timer("download", **tags):
+                body = self._get(endpoint, params)
+            if lease is not None:
+                lease.check()
+            with self.metrics.timer("extract", **tags), zipfile.ZipFile(io.BytesIO(body)) as z:
+                paths = self._unpack(z, dest)
+        else:
+            with self.metrics.timer("download", **tags):
+                part = self._download_archive(endpoint, params, self._archive_record(endpoint, params, dest))
+            if part is None:
+                self.metrics.count("not_modified", **tags)
+                return []
+            self.metrics.count("download_bytes", part.stat().st_size, **tags)
+            if lease is not None:
+                lease.check()
+            with self.metrics.timer("extract", **tags):
+                paths = self._extract(part, dest)
+        self.metrics.count("extracted_files", len(paths), **tags)
+        with self.metrics.timer("extract_hooks", **tags):
+            self._after_extract(endpoint, params, paths)
+        return paths
+
+    def _download_archive(self, endpoint: str, params: dict, record: dict = None):
+        """`download` into the partial path, resuming after dropped connections."""
+        part = self._partial_path(endpoint, params)
+        for attempt in range(self.retries + 1):
+            try:
+                return self.download(endpoint, params, part, record)
+            except RETRY_ERRORS:
+                # connection dropped mid-body: the next attempt resumes from `part`
+                if attempt == self.retries:
+                    raise
+                self._sleep(attempt)
+
+    def iter_batches(self, endpoint: str, params: dict, batch_size: int = 100_000, dest: Path = None):
+        """
+        Download an archive and yield `(member_name, DataFrame)` batches of at
+        most `batch_size` rows, decompressing and parsing each member
+        incrementally from the archive rather than from extracted files.
+        Members are also written to `dest` only if one is given, as by
+        `fetch_zip` (staged, path-checked and passed to `extract_hooks`).
+
+        If iteration stops early the archive is kept, and the next call for the
+        same request reuses it without downloading again.
+        """
+        part = self._download_archive(endpoint, params)
+        yield from self._iter_archive(endpoint, params, part, batch_size, dest)
+
+    def _iter_archive(self, endpoint: str, params: dict, part: Path, batch_size: int, dest: Path = None):
+        """The parsing half of `iter_batches`; `part` is dropped once fully read."""
+        try:
+            with zipfile.ZipFile(part) as z:
+                if dest is not None:
+                    dest.mkdir(parents=True, exist_ok=True)
+                    self._after_extract(endpoint, params, self._unpack(z, dest))
+                for info in z.infolist():
+                    if info.is_dir() or info.file_size == 0:
+                        continue
+                    with z.open(info) as fh:
+                        for batch in read_bars(fh, chunksize=batch_size):
+                            yield info.filename, batch
+        except zipfile.BadZipFile:
+            self._discard(part)
+            raise
+        self._discard(part)
+
+    def _unpack(self, z: zipfile.ZipFile, dest: Path) -> list:
+        """
+        Extract the members of `z` into `dest` and return their paths. With a
+        `meta` store, members whose central-directory CRC32 and size match the
+        last extracted copy (still on disk) are skipped.
+
+        Members are first written to a private staging directory under
+        `work_dir/.staging` and then renamed into place, so readers (and
+        other runners) only ever see complete files. Member names are
+        stripped of absolute and `..` parts as by `ZipFile.extract`, and an
+        archive with a member that would still land outside `dest` is
+        rejected before anything is written.
+        """
+        root = dest.resolve()
+        known = {} if self.meta is None else self.meta.get_members(root)
+        members = []
+        for info in z.infolist():
+            if info.is_dir():
+                continue
+            # the name zipfile itself extracts to: no drive, "", "." or ".." parts
+            parts = [p for p in os.path.splitdrive(info.filename.replace("\\", "/"))[1].split("/")
+                     if p not in ("", ".", "..")]
+            if not parts:
+                continue
+            target = dest.joinpath(*parts)
+            key = target.resolve()
+            if root not in key.parents:
+                # e.g. through a symlinked directory inside `dest`
+                raise zipfile.BadZipFile(f"member {info.filename!r} would extract outside {dest}")
+            members.append((info, target, str(key)))
+        staging = Path(self.work_dir) / ".staging" / uuid.uuid4().hex
+        written, changed = [], []
+        try:
+            for info, target, key in members:
+                if known.get(key) == (info.CRC, info.file_size) and target.exists() \
+                        and target.stat().st_size == info.file_size:
+                    continue
+                staged = z.extract(info, path=staging)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.replace(staged, target)
+                except OSError:
+                    # `dest` on another filesystem: fall back to a copying move
+                    shutil.move(staged, target)
+                written.append(target)
+                changed.append((key, info.CRC, info.file_size))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        if self.meta is not None:
+            self.meta.record_members(changed)
+        return written
+
+    @staticmethod
+    def _sha256(path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def _extract(self, part: Path, dest: Path) -> list:
+        """
+        Unpack a downloaded archive into `dest`, drop it and return the paths
+        written. The archive's validators and SHA-256 are recorded in `meta`
+        for the next conditional request.
+        """
+        sidecar = self._validators_path(part)
+        try:
+            with zipfile.ZipFile(part) as z:
+                paths = self._unpack(z, dest)
+        except zipfile.BadZipFile:
+            # corrupt or mismatched partial: start over on the next call
+            self._discard(part)
+            raise
+        if self.meta is not None:
+            saved = json.loads(sidecar.read_text()) if sidecar.exists() else {}
+            self.meta.set_archive(part.stem, saved.get("etag"), saved.get("last_modified"),
+                                  self._sha256(part))
+        self._discard(part)
+        return paths
+
+    def _discard(self, part: Path):
+        for path in (part, self._validators_path(part)):
+            if path.exists():
+                path.unlink()
+
+    def _after_extract(self, endpoint: str, params: dict, paths: list):
+        for hook in self.extract_hooks:
+            hook(endpoint, params, paths)
@@ -0,0 +1,207 @@
+"""
+Continuous futures series stitched from per-contract bars.
+
+Contracts are named `<ROOT><MONTH CODE><YY>` (`ESH24`, `CLZ23`). Each bar is
+assigned to its trading day (the futures session's closing date), and a
+roll rule picks the active contract per day:
+
+* `"volume"`: roll once the next contract trades more than the current
+  one; the switch takes effect the following day, and never rolls back;
+* `"calendar"`: roll `days_before` calendar days before each contract's
+  expiry (its last bar unless `expiries` are given).
+
+The roll table (first day of each contract) is cached in `MetadataStore`
+and extended from its last entry when new days arrive. Stitching and back
+adjustment (`"difference"` or `"ratio"`) are vectorized over whole segments.
+"""
+import hashlib, re
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .parsing import read_bars, symbol_from_name
+from .resample import DAY, SESSIONS, bucket_starts
+from .series import BarSeries, FIELDS, PRICES
+
+MONTH_CODES = "FGHJKMNQUVXZ"
+_CONTRACT = re.compile(r"^(?P<root>[A-Z0-9]+?)(?P<month>[FGHJKMNQUVXZ])(?P<year>\d{2})$")
+
+def parse_contract(name: str):
+    """`"ESH24"` -> `("ES", 2024, 3)`, or `None` for a name that is not a contract."""
+    m = _CONTRACT.match(name)
+    if not m:
+        return None
+    return m["root"], 2000 + int(m["year"]), MONTH_CODES.index(m["month"]) + 1
+
+def sort_contracts(names) -> list:
+    """Contract names in expiry order."""
+    return sorted(names, key=lambda n: parse_contract(n)[1:])
+
+def _merge(parts) -> BarSeries:
+    """One timestamp-sorted series from `parts`; earlier parts win on shared timestamps."""
+    if len(parts) == 1:
+        return parts[0]
+    both = {f: np.concatenate([np.asarray(getattr(p, f)) for p in parts]) for f in FIELDS}
+    _, first = np.unique(both["timestamp"], return_index=True)
+    return BarSeries(*(both[f][first] for f in FIELDS))
+
+def load_contracts(directory: Path, price_dtype="float32") -> dict:
+    """
+    `{root: {contract: BarSeries}}` for every contract bar file below
+    `directory`. A contract found in several files (a full download and
+    later updates) is merged into one series, with the most recently
+    written file winning where their bars overlap.
+    """
+    files = {}
+    for path in Path(directory).rglob("*"):
+        if not path.is_file() or "meta" in path.parts:
+            continue
+        stat = path.stat()
+        name = symbol_from_name(path.name)
+        if stat.st_size and parse_contract(name) is not None:
+            files.setdefault(name, []).append((-stat.st_mtime_ns, str(path)))
+    roots = {}
+    for name in sorted(files):
+        parts = [BarSeries.from_frame(read_bars(Path(p)), price_dtype) for _, p in sorted(files[name])]
+        roots.setdefault(parse_contract(name)[0], {})[name] = _merge(parts)
+    return roots
+
+def _trading_days(timestamp) -> np.ndarray:
+    return bucket_starts(timestamp, "1day", SESSIONS["futures"])[0]
+
+def _date(ns: int) -> str:
+    return str(np.datetime64(int(ns), "ns").astype("datetime64[D]"))
+
+def roll_table(contracts: dict, rule: str = "volume", days_before: int = 5, expiries: dict = None,
+               since: int = None, start: str = None) -> list:
+    """
+    `[(first_day_ns, contract), ...]` for `contracts` (`{name: BarSeries}`).
+    With `since`/`start` only days from `since` on are considered and
+    `start` is the contract active on that day, so a cached table can be
+    extended without revisiting its history.
+    """
+    names = sort_contracts(contracts)
+    if start is not None:
+        names = names[names.index(start):]
+    days = [_trading_days(contracts[n].timestamp) for n in names]
+    if since is not None:
+        days = [d[np.searchsorted(d, since):] for d in days]
+    all_days = np.unique(np.concatenate(days)) if days else np.empty(0, "int64")
+    if len(all_days) == 0:
+        return []
+    if rule == "calendar":
+        ends = []
+        for n, d in zip(names, days):
+            if expiries and n in expiries:
+                ends.append(pd.Timestamp(expiries[n]).as_unit("ns").value)
+            else:
+                full = _trading_days(contracts[n].timestamp)
+                ends.append(int(full[-1]) if len(full) else 0)
+        roll = np.array(ends, dtype="int64") - days_before * DAY
+        # later contracts never roll earlier than the ones before them
+        active = np.searchsorted(np.maximum.accumulate(roll), all_days, "right")
+        active = np.minimum(active, len(names) - 1)
+    elif rule == "volume":
+        volume = np.zeros((len(names), len(all_days)))
+        for k, (n, d) in enumerate(zip(names, days)):
+            v = np.asarray(contracts[n].volume, dtype="float64")[-len(d):] if len(d) else []
+            np.add.at(volume[k], np.searchsorted(all_days, d), v)
+        leader = np.maximum.accumulate(np.argmax(volume, axis=0))
+        # decided on a day's volume, effective from the next day...
+        active = np.concatenate([[0], leader[:-1]])
+        # ...unless the contract has stopped trading by then
+        gone = volume[active, np.arange(len(all_days))] == 0
+        active = np.maximum.accumulate(np.where(gone, leader, active))
+    else:
+        raise ValueError(f"unknown roll rule {rule!r}")
+    change = np.flatnonzero(np.r_[True, active[1:] != active[:-1]])
+    return [(int(all_days[i]), names[active[i]]) for i in change]
+
+class ContinuousBuilder:
+    def __init__(self, meta=None, rule: str = "volume", days_before: int = 5, expiries: dict = None):
+        """
+        Build continuous series under one roll rule. With `meta` (a
+        `MetadataStore`) roll tables are cached per root and only extended
+        from their last roll on later calls.
+        """
+        self.meta = meta
+        self.rule = rule
+        self.days_before = days_before
+        self.expiries = expiries
+
+    @property
+    def rule_key(self) -> str:
+        """Names the cached roll tables; calendar rolls also depend on `days_before` and `expiries`."""
+        if self.rule == "volume":
+            return self.rule
+        key = f"{self.rule}:{self.days_before}"
+        if self.expiries:
+            dates = sorted((n, pd.Timestamp(d).date().isoformat()) for n, d in self.expiries.items())
+            key += ":" + hashlib.sha1(repr(dates).encode()).hexdigest()[:12]
+        return key
+
+    def rolls(self, root: str, contracts: dict) -> list:
+        """`[(date, contract), ...]`: the first trading day of each active contract."""
+        cached = self.meta.get_rolls(root, self.rule_key) if self.meta is not None else []
+        since = start = None
+        if cached and cached[-1][1] in contracts:
+            since, start = pd.Timestamp(cached[-1][0]).as_unit("ns").value, cached[-1][1]
+        rows = [(_date(d), c) for d, c in roll_table(contracts, self.rule, self.days_before,
+                                                     self.expiries, since, start)]
+        if self.meta is None:
+            return rows
+        if since is None:
+            self.meta.set_rolls(root, self.rule_key, rows)
+            return rows
+        self.meta.set_rolls(root, self.rule_key, rows, since=cached[-1][0])
+        return [r for r in cached if r[0] < cached[-1][0]] + rows
+
+    def build(self, root: str, contracts: dict, adjust: str = "ratio"):
+        """
+        Stitch `contracts` (`{name: BarSeries}`) into one `BarSeries`.
+        `adjust` is `"ratio"`, `"difference"` or `None` (raw prices); earlier
+        segments are shifted so each roll has no price gap. Returns
+        `(series, rolls)`.
+        """
+        rolls = self.rolls(root, contracts)
+        if not rolls:
+            return BarSeries(*(np.empty(0, "int64") for _ in FIELDS)), rolls
+        starts = [pd.Timestamp(d).as_unit("ns").value for d, _ in rolls]
+        bounds = starts[1:] + [None]
+        pieces, refs = [], []
+        for (_, name), lo, hi in zip(rolls, starts, bounds):
+            series = contracts[name]
+            days = _trading_days(series.timestamp)
+            a = int(np.searchsorted(days, lo))
+            b = len(days) if hi is None else int(np.searchsorted(days, hi))
+            pieces.append(series[a:b])
+        for k in range(1, len(rolls)):
+            old, new = pieces[k - 1], contracts[rolls[k][1]]
+            if len(old) == 0:
+                refs.append((1.0, 1.0))
+                continue
+            # both contracts' closes at the old contract's last stitched bar
+            at = int(old.timestamp[-1])
+            i = max(int(np.searchsorted(new.timestamp, at, "right")) - 1, 0)
+            refs.append((float(old.close[-1]), float(new.close[i])))
+        lengths = [len(p) for p in pieces]
+        columns = {f: np.concatenate([np.asarray(getattr(p, f)) for p in pieces]) for f in FIELDS}
+        if adjust and refs:
+            old_ref, new_ref = np.array(refs).T
+            if adjust == "difference":
+                gaps = np.append(np.cumsum((new_ref - old_ref)[::-1])[::-1], 0.0)
+                shift = np.repeat(gaps, lengths)
+                for p in PRICES:
+                    columns[p] = (columns[p] + shift).astype(columns[p].dtype)
+            elif adjust == "ratio":
+                ratios = np.append(np.cumprod((new_ref / old_ref)[::-1])[::-1], 1.0)
+                scale = np.repeat(ratios, lengths)
+                for p in PRICES:
+                    columns[p] = (columns[p] * scale).astype(columns[p].dtype)
+            else:
+                raise ValueError(f"unknown adjustment {adjust!r}")
+        return BarSeries(*(columns[f] for f in FIELDS)), rolls
+
+    def build_all(self, directory: Path, adjust: str = "ratio") -> dict:
+        """`{root: (series, rolls)}` for every root with contract files below `directory`."""
+        return {root: self.build(root, contracts, adjust)
+                for root, contracts in load_contracts(directory).items()}
@@ -0,0 +1,96 @@
+"""
+Sharded, checkpointed full harvests.
+
+A full bootstrap is split into shards (ticker ranges, symbol lists, contract
+months: whatever key the handler's `download_full` takes first) that download
+in parallel. Each finished shard is checkpointed through
+`MetadataStore.set_full`, so a rerun after a crash only fetches the shards
+that are missing, and interrupted archives resume from their partial files.
+"""
+import logging, string, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from datetime import date
+from .leases import LeaseLost, job_name
+from .scheduler import RunResult
+
+log = logging.getLogger(__name__)
+
+def symbol_shards(symbols, size: int) -> list:
+    """`["AAPL", "MSFT", "SPY"], 2` -> `["AAPL,MSFT", "SPY"]`."""
+    symbols = list(symbols)
+    return [",".join(symbols[i:i + size]) for i in range(0, len(symbols), size)]
+
+def letter_shards(size: int, sep: str = "-") -> list:
+    """Ticker ranges covering A-Z, `size` letters each: `5` -> `["A-E", ..., "Z-Z"]`."""
+    letters = string.ascii_uppercase
+    return [f"{letters[i]}{sep}{letters[min(i + size, len(letters)) - 1]}"
+            for i in range(0, len(letters), size)]
+
+class FullHarvest:
+    def __init__(self, handler, max_workers: int = 4, leases=None):
+        """
+        Runs `handler.download_full(shard, **kwargs)` for each shard on up to
+        `max_workers` threads. With a `leases.JobQueue`, several processes or
+        hosts can run the same harvest and split the shards between them.
+        """
+        self.handler = handler
+        self.meta = handler.meta
+        self.max_workers = max_workers
+        self.leases = leases
+
+    def is_done(self, shard, since: date) -> bool:
+        local = self.meta.get(self.handler.asset_type, f"full_{shard}")
+        return local is not None and date.fromisoformat(local) >= since
+
+    def pending(self, shards, since: date = None) -> list:
+        """
+        Shards without a checkpoint at least as recent as `since` (default:
+        the remote full-update date, so a newer server harvest redoes them).
+        """
+        if since is None:
+            since = self.handler.last_remote_update(full=True)
+        return [s for s in shards if not self.is_done(s, since)]
+
+    def _harvest(self, shard, kwargs, since):
+        start = time.perf_counter()
+        lease = nullcontext(True) if self.leases is None else \
+            self.leases.lease(job_name(self.handler.asset_type, "full", shard))
+        try:
+            with lease as held:
+                if held is None:
+                    return RunResult(self.handler.asset_type, f"full_{shard}", "leased",
+                                     time.perf_counter() - start)
+                # another runner may have checkpointed it since `pending` was computed
+                if self.leases is not None and self.is_done(shard, since):
+                    return RunResult(self.handler.asset_type, f"full_{shard}", "skipped",
+                                     time.perf_counter() - start)
+                self.handler.download_full(shard, lease=None if self.leases is None else held, **kwargs)
+        except LeaseLost:
+            log.warning("%s full shard %s lease lost; left to the runner that took it over",
+                        self.handler.asset_type, shard)
+            return RunResult(self.handler.asset_type, f"full_{shard}", "leased",
+                             time.perf_counter() - start)
+        except Exception as e:
+            log.exception("%s full shard %s failed", self.handler.asset_type, shard)
+            return RunResult(self.handler.asset_type, f"full_{shard}", "failed",
+                             time.perf_counter() - start, e)
+        return RunResult(self.handler.asset_type, f"full_{shard}", "ran", time.perf_counter() - start)
+
+    def run(self, shards, since: date = None, **kwargs) -> list:
+        """
+        Download every pending shard and return one `RunResult` per shard;
+        already checkpointed shards are reported as "skipped" and shards leased
+        by another runner as "leased". `kwargs` go to
+        `download_full` (`timeframe`, `adjustment`, ...).
+        """
+        shards = list(shards)
+        if since is None:
+            since = self.handler.last_remote_update(full=True)
+        todo = self.pending(shards, since)
+        results = {s: RunResult(self.handler.asset_type, f"full_{s}", "skipped", 0.0)
+                   for s in set(shards) - set(todo)}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for s, result in zip(todo, pool.map(lambda s: self._harvest(s, kwargs, since), todo)):
+                results[s] = result
+        return [results[s] for s in shards]
@@ -0,0 +1,143 @@
+"""
+High-level helpers: bootstrap the core objects and load up-to-date data
+into a single DataFrame.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .cache import cache_key
+from .client import FrdClient
+from .metadata import MetadataStore
+from .parsing import BAR_COLUMNS, read_bars, symbol_from_name
+from .instruments.base import RemoteDateCache
+from .scheduler import UpdateScheduler
+
+# `last_update` answers shared by `load_dataframe` calls without their own cache
+_REMOTE_DATES = RemoteDateCache()
+
+def initialize(userid: str, work_dir: Path, db_path: Path = None, **client_kwargs):
+    """Return `(client, meta, scheduler)` rooted at `work_dir`."""
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    meta = MetadataStore(db_path or work_dir / "metadata.db", metrics=client_kwargs.get("metrics"))
+    client = FrdClient(userid, work_dir, meta=meta, **client_kwargs)
+    client.extract_hooks.append(meta.on_extract)
+    return client, meta, UpdateScheduler(client, meta)
+
+def _ensure_fresh(handler, work_dir, asset_type, period, timeframe, kwargs):
+    """
+    Download `period` if the local copy is stale; return its directory and
+    the `MetadataStore` period key that records it.
+    """
+    if period == "full":
+        key, _ = handler.full_requests(timeframe=timeframe, **kwargs)
+        if handler._is_stale(handler.last_remote_update(full=True), f"full_{key}"):
+            handler.download_full(timeframe=timeframe, **kwargs)
+        return work_dir / asset_type / "full" / key, f"full_{key}"
+    if handler.needs_update(period):
+        handler.download_update(period=period, timeframe=timeframe, **kwargs)
+    return work_dir / asset_type / period, period
+
+def _walk(base: Path, symbols=None) -> list:
+    """Non-empty bar files under `base`, skipping ETF `meta/` members and unwanted symbols."""
+    files = []
+    for path in sorted(base.rglob("*")):
+        if not path.is_file() or "meta" in path.relative_to(base).parts[:-1]:
+            continue
+        if path.stat().st_size == 0:
+            continue
+        if symbols is not None and symbol_from_name(path.name) not in symbols:
+            continue
+        files.append(path)
+    return files
+
+def _data_files(meta, asset_type, base: Path, symbols, timeframe, start, end):
+    """
+    Non-empty bar files under `base` that can hold bars in `[start, end)`,
+    looked up in the manifest without walking the tree. Directories with
+    nothing recorded (extracted without `MetadataStore.on_extract`) are
+    walked instead. Returns `(files, indexed)`.
+    """
+    root = base.resolve()
+    if not meta.has_files(root):
+        return _walk(base, symbols), False
+    rows = meta.find_files(asset_type, symbols, timeframe, start, end, under=root)
+    files = (Path(r["path"]) for r in rows if r["bytes"])
+    return sorted(p for p in files if "meta" not in p.relative_to(root).parts[:-1]), True
+
+def _load_file(path: Path, start=None, end=None, columns=None) -> pd.DataFrame:
+    filtered = start is not None or end is not None
+    # the time filter needs timestamps even when the caller did not ask for them
+    drop = filtered and columns is not None and "timestamp" not in columns
+    df = read_bars(path, usecols=list(columns) + ["timestamp"] if drop else columns)
+    if filtered and "timestamp" in df:
+        mask = np.ones(len(df), dtype=bool)
+        if start is not None:
+            mask &= (df["timestamp"] >= start).to_numpy()
+        if end is not None:
+            mask &= (df["timestamp"] < end).to_numpy()
+        df = df[mask]
+    if drop:
+        df = df.drop(columns="timestamp")
+    return df
+
+def load_dataframe(client, meta, asset_type: str, period: str, timeframe: str,
+                   symbols=None, start=None, end=None, columns=None,
+                   max_workers: int = None, cache=None, remote_cache=None, **kwargs) -> pd.DataFrame:
+    """
+    Bring `asset_type`/`period` up to date, then return its bars as one
+    DataFrame with a categorical `symbol` column.
+
+    `kwargs` are the handler's download arguments (`ticker_list`,
+    `adjustment`, ...). `symbols` limits which files are opened at all;
+    `start` (inclusive) and `end` (exclusive) filter rows by timestamp and
+    also skip files whose manifest span lies outside the range, and
+    `columns` limits which columns are parsed. Files are parsed in parallel
+    on a pool of `max_workers` processes (default: one per CPU) and
+    concatenated once at the end.
+
+    With a `ResultCache` as `cache`, a repeated call returns the stored frame
+    for as long as the `MetadataStore` date of `asset_type`/`period` is
+    unchanged, skipping all parsing. The freshness check's `last_update`
+    probe is answered from `remote_cache` (a `RemoteDateCache`, by default
+    one shared by all calls) while it is fresh.
+    """
+    handler = UpdateScheduler.HANDLERS[asset_type](client, meta, remote_cache or _REMOTE_DATES)
+    base, period_key = _ensure_fresh(handler, client.work_dir, asset_type, period, timeframe, kwargs)
+    start = None if start is None else pd.Timestamp(start)
+    end = None if end is None else pd.Timestamp(end)
+    if cache is not None:
+        key = cache_key(asset_type, period, timeframe, symbols=None if symbols is None else set(symbols),
+                        start=start, end=end, columns=columns, **kwargs)
+        version = meta.get(asset_type, period_key)
+        df = cache.get(key, version)
+        if df is not None:
+            return df
+        df = _load(meta, asset_type, base, timeframe, symbols, start, end, columns, max_workers)
+        cache.put(key, version, df)
+        return df
+    return _load(meta, asset_type, base, timeframe, symbols, start, end, columns, max_workers)
+
+def _load(meta, asset_type, base, timeframe, symbols, start, end, columns, max_workers) -> pd.DataFrame:
+    symbols = None if symbols is None else set(symbols)
+    files, indexed = _data_files(meta, asset_type, base, symbols, timeframe, start, end)
+    if not files and not (indexed and (start is not None or end is not None)):
+        raise FileNotFoundError(f"no data files under {base}")
+    if not files:
+        return pd.DataFrame(columns=["symbol"] + [c for c in columns or BAR_COLUMNS if c != "symbol"])
+    args = [files, [start] * len(files), [end] * len(files), [columns] * len(files)]
+    workers = min(max_workers or os.cpu_count() or 1, len(files))
+    if workers <= 1:
+        frames = list(map(_load_file, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(_load_file, *args, chunksize=max(1, len(files) // (workers * 4))))
+    names = [symbol_from_name(p.name) for p in files]
+    categories = sorted(set(names))
+    code = {n: i for i, n in enumerate(categories)}
+    codes = np.repeat([code[n] for n in names], [len(f) for f in frames])
+    df = pd.concat(frames, ignore_index=True)
+    df.insert(0, "symbol", pd.Categorical.from_codes(codes, categories))
+    return df
@@ -1,5 +1,34 @@
+# __init__.py
+import threading, time
 from abc import ABC, abstractmethod
-from datetime import date
+from datetime import date, datetime
+from ..metrics import NULL_METRICS
+
+class RemoteDateCache:
+    """
+    TTL cache of `last_update` answers keyed by `(asset_type, full)`.
+    The scheduler shares one instance with all of its handlers so each
+    endpoint is probed once per run instead of before and after every download.
+    """
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._dates = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._dates.get(key)
+        if hit is None or time.monotonic() - hit[1] >= self.ttl:
+            return None
+        return hit[0]
+
+    def set(self, key, value: date):
+        with self._lock:
+            self._dates[key] = (value, time.monotonic())
+
+    def clear(self):
+        with self._lock:
+            self._dates.clear()
 
 class InstrumentHandler(ABC):
     """
@@ -9,34 +38,79 @@ class InstrumentHandler(ABC):
     """
     asset_type: str
 
-    def __init__(self, client, meta):
+    def __init__(self, client, meta, remote_cache=None):
         self.client = client
         self.meta   = meta
+        self.remote_cache = remote_cache or RemoteDateCache()
         if not hasattr(self, 'asset_type'):
             raise ValueError("Subclasses must define asset_type class attribute")
 
     @abstractmethod
-    def download_full(self, **kwargs):
-        """Download full dataset for this asset type."""
+    def full_requests(self, **kwargs):
+        """
+        Return `(key, requests)` for a full harvest: `key` names the slice
+        (ticker range, list, contract month...) for `MetadataStore.set_full`,
+        and each request is a dict of `FrdClient.fetch_zip` kwargs.
+        """
         raise NotImplementedError
 
     @abstractmethod
-    def download_update(self, period: str, **kwargs):
-        """Download incremental update for given period (day/week/month)."""
+    def update_requests(self, period: str, **kwargs):
+        """Return the `fetch_zip` kwargs for an incremental update of `period` (day/week/month)."""
         raise NotImplementedError
 
-    @abstractmethod
-    def last_remote_update(self, full: bool=False) -> date:
-        """Return date of last remote update (full if specified)."""
-        raise NotImplementedError
+    @property
+    def metrics(self):
+        return getattr(self.client, "metrics", NULL_METRICS)
 
-    def needs_update(self, period: str) -> bool:
+    def download_full(self, *args, lease=None, **kwargs):
         """
-        Compare remote vs local metadata to decide if an update is needed.
+        Download full dataset for this asset type; arguments as for
+        `full_requests`. A `leases.Lease` as `lease` is checked before each
+        extraction and before the date is recorded.
         """
-        remote = self.last_remote_update(full=False)
+        key, requests = self.full_requests(*args, **kwargs)
+        with self.metrics.timer("handler_download", asset_type=self.asset_type, period="full"):
+            for request in requests:
+                self.client.fetch_zip(**request, lease=lease)
+            if lease is not None:
+                lease.check()
+            self.meta.set_full(self.asset_type, key, self.last_remote_update(full=True))
+
+    def download_update(self, period: str, *args, lease=None, **kwargs):
+        """Download incremental update for given period (day/week/month); `lease` as for `download_full`."""
+        with self.metrics.timer("handler_download", asset_type=self.asset_type, period=period):
+            for request in self.update_requests(period, *args, **kwargs):
+                self.client.fetch_zip(**request, lease=lease)
+            if lease is not None:
+                lease.check()
+            self.meta.set_update(self.asset_type, period, self.last_remote_update(full=False))
+
+    def _remote_params(self, full: bool) -> dict:
+        return {"type": self.asset_type, "is_full_update": str(full).lower()}
+
+    @staticmethod
+    def _parse_remote(raw: bytes) -> date:
+        return datetime.strptime(raw.decode(), "%Y-%m-%d").date()
+
+    def last_remote_update(self, full: bool=False) -> date:
+        """Return date of last remote update (full if specified), cached in `remote_cache`."""
+        key = (self.asset_type, full)
+        remote = self.remote_cache.get(key)
+        if remote is None:
+            remote = self._parse_remote(self.client._get("last_update", self._remote_params(full)))
+            self.remote_cache.set(key, remote)
+        return remote
+
+    def _is_stale(self, remote: date, period: str) -> bool:
         local_str = self.meta.get(self.asset_type, period)
         if local_str is None:
             return True
         local = date.fromisoformat(local_str)
-        return remote > local
\ No newline at end of file
+        return remote > local
+
+    def needs_update(self, period: str) -> bool:
+        """
+        Compare remote vs local metadata to decide if an update is needed.
+        """
+        return self._is_stale(self.last_remote_update(full=False), period)
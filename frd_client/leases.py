@@ -0,0 +1,98 @@
+"""
+Lease-based coordination of concurrent runners.
+
+Jobs are named `asset_type/period[/shard]`. A runner leases a job in the
+shared `MetadataStore` before downloading it; the lease expires after `ttl`
+seconds unless a heartbeat thread keeps renewing it, so a crashed runner's
+jobs become available again. Combined with re-checking whether the job is
+still needed once the lease is held, each unit is downloaded once even when
+several processes or hosts run the scheduler at the same time. A runner whose
+lease was taken over (after a missed heartbeat) gets `LeaseLost` from
+`Lease.check` and stops before extracting or recording anything.
+
+Hosts must share the database on a filesystem with working SQLite locking
+and roughly synchronized clocks (expiries are wall-clock times).
+"""
+import logging, os, socket, threading, uuid
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+def job_name(asset_type, period, shard=None) -> str:
+    return f"{asset_type}/{period}" if shard is None else f"{asset_type}/{period}/{shard}"
+
+class LeaseLost(RuntimeError):
+    """The lease on a job was taken over by another runner while it was held."""
+
+class Lease:
+    """A held lease, renewed every `ttl / 3` seconds until released."""
+    def __init__(self, meta, job, owner, ttl):
+        self.meta = meta
+        self.job = job
+        self.owner = owner
+        self.ttl = ttl
+        self.lost = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._heartbeat, name=f"lease:{job}", daemon=True)
+        self._thread.start()
+
+    def _heartbeat(self):
+        while not self._stop.wait(self.ttl / 3):
+            try:
+                held = self.meta.renew_lease(self.job, self.owner, self.ttl)
+            except Exception:
+                log.warning("lease %s heartbeat failed", self.job, exc_info=True)
+                continue
+            if not held:
+                log.error("lease %s was taken over by another runner", self.job)
+                self.lost.set()
+                return
+
+    def check(self):
+        """Raise `LeaseLost` if the heartbeat found the lease taken over."""
+        if self.lost.is_set():
+            raise LeaseLost(f"lease {self.job} was taken over by another runner")
+
+    def release(self):
+        self._stop.set()
+        self._thread.join()
+        if not self.lost.is_set():
+            self.meta.release_lease(self.job, self.owner)
+
+class JobQueue:
+    def __init__(self, meta, owner: str = None, ttl: float = 300):
+        """
+        Leases jobs in `meta` (a `MetadataStore` shared by all runners) as
+        `owner` (default: host, pid and a random suffix) for `ttl` seconds
+        at a time.
+        """
+        self.meta = meta
+        self.owner = owner or default_owner()
+        self.ttl = ttl
+
+    @contextmanager
+    def lease(self, job: str):
+        """Yield a `Lease` for `job`, or `None` if another runner holds it."""
+        if not self.meta.acquire_lease(job, self.owner, self.ttl):
+            yield None
+            return
+        lease = Lease(self.meta, job, self.owner, self.ttl)
+        try:
+            yield lease
+        finally:
+            lease.release()
+
+    def run(self, jobs, fn) -> dict:
+        """
+        Call `fn(job)` for every job this runner can lease; returns
+        `{job: result}`, leaving out the jobs other runners hold.
+        """
+        results = {}
+        for job in jobs:
+            with self.lease(job) as held:
+                if held is not None:
+                    results[job] = fn(job)
+        return results
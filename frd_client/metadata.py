@@ -1,4 +1,31 @@
-import sqlite3
+import sqlite3, threading, time, weakref
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from .metrics import NULL_METRICS
+from .parsing import file_stats, symbol_from_name
+
+MANIFEST_COLUMNS = ["path", "asset_type", "symbol", "timeframe", "min_ts", "max_ts",
+                    "rows", "bytes", "checksum"]
+
+def ts_key(value) -> str:
+    """
+    Render a date/datetime bound in the manifest's text form. Midnight
+    becomes a bare date so it compares correctly against both daily
+    (`YYYY-MM-DD`) and intraday (`YYYY-MM-DD HH:MM:SS`) timestamps.
+    """
+    if hasattr(value, "hour") and not (value.hour or value.minute or value.second):
+        return value.strftime("%Y-%m-%d")
+    return str(value)[:19]
+
+class _ThreadConn:
+    """Lives in thread-local storage, so it is collected when its thread exits."""
+
+def _release(conns: list, lock, conn):
+    with lock:
+        if conn in conns:
+            conns.remove(conn)
+    conn.close()
 
 class MetadataStore:
     """
@@ -26,8 +53,23 @@ class MetadataStore:
     In short, it keeps your handlers focused purely on *how* to download their data, while the base class uniformly handles *when* that download is needed.
 
     """
-    def __init__(self, db_path):
-        self.conn = sqlite3.connect(db_path)
+    def __init__(self, db_path, timeout=30.0, history=False, metrics=None):
+        """
+        Each thread gets its own connection to `db_path` in WAL mode, so
+        readers never block writers and parallel downloaders can record state
+        concurrently; a writer waits up to `timeout` seconds for the lock
+        instead of failing with "database is locked". With `history=True`
+        every `set_update`/`set_full` is also appended to `update_history`.
+        Writes and commits are timed into `metrics`, tagged by table.
+        """
+        self.db_path = str(db_path)
+        self.timeout = timeout
+        self.history = history
+        self.metrics = metrics or NULL_METRICS
+        self._local = threading.local()
+        self._conns = []
+        self._conns_lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
         self.conn.execute("""
           CREATE TABLE IF NOT EXISTS updates (
             asset_type TEXT,
@@ -36,6 +78,146 @@ class MetadataStore:
             PRIMARY KEY (asset_type, period)
           )
         """)
+        self.conn.execute("""
+          CREATE TABLE IF NOT EXISTS update_history (
+            asset_type  TEXT,
+            period      TEXT,
+            last_date   TEXT,
+            recorded_at TEXT
+          )
+        """)
+        # one row per extracted data file, so readers can skip files that
+        # cannot overlap a query instead of opening every one
+        self.conn.execute("""
+          CREATE TABLE IF NOT EXISTS manifest (
+            path       TEXT PRIMARY KEY,
+            asset_type TEXT,
+            symbol     TEXT,
+            timeframe  TEXT,
+            min_ts     TEXT,
+            max_ts     TEXT,
+            rows       INTEGER,
+            bytes      INTEGER,
+            checksum   TEXT
+          )
+        """)
+        # validators of the last extracted copy of each archive, keyed like
+        # FrdClient partial files, and CRC32/size of every extracted member
+        self.conn.execute("""
+          CREATE TABLE IF NOT EXISTS archives (
+            key           TEXT PRIMARY KEY,
+            etag          TEXT,
+            last_modified TEXT,
+            sha256        TEXT,
+            updated_at    TEXT
+          )
+        """)
+        self.conn.execute("""
+          CREATE TABLE IF NOT EXISTS members (
+            path TEXT PRIMARY KEY,
+            crc  INTEGER,
+            size INTEGER
+          )
+        """)
+        # corporate actions for local adjustment: split ratio or cash dividend,
+        # with the last unadjusted close before a dividend's ex-date once known
+        self.conn.execute("""
+          CREATE TABLE IF NOT EXISTS actions (
+            symbol    TEXT,
+            date      TEXT,
+            type      TEXT,
+            value     REAL,
+            ref_close REAL,
+            PRIMARY KEY (symbol, date, type)
+          )
+        """)
+        # cached continuous-futures roll tables: the contract active from `date`
+        self.conn.execute("""
+          CREATE TABLE IF NOT EXISTS rolls (
+            root     TEXT,
+            rule     TEXT,
+            date     TEXT,
+            contract TEXT,
+            PRIMARY KEY (root, rule, date)
+          )
+        """)
+        # work leases, so concurrent runners split jobs instead of repeating them
+        self.conn.execute("""
+          CREATE TABLE IF NOT EXISTS leases (
+            job         TEXT PRIMARY KEY,
+            owner       TEXT,
+            expires     REAL,
+            acquired_at TEXT
+          )
+        """)
+        self.conn.execute("""
+          CREATE INDEX IF NOT EXISTS manifest_lookup
+            ON manifest(asset_type, symbol, timeframe, min_ts, max_ts)
+        """)
+        self.conn.commit()
+
+    @property
+    def conn(self):
+        """This thread's connection, opened on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+            # WAL only needs an fsync at checkpoints, not on every commit
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._conns_lock:
+                self._conns.append(conn)
+            # close it once the thread is gone (short-lived pool and lease threads)
+            self._local.owner = _ThreadConn()
+            weakref.finalize(self._local.owner, _release, self._conns, self._conns_lock, conn)
+        return conn
+
+    def close(self):
+        """Close the connections of all threads."""
+        with self._conns_lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+        self._local = threading.local()
+
+    @contextmanager
+    def batch(self):
+        """
+        Group writes into one transaction, committed (once) on exit and
+        rolled back if the block raises:
+
+            with meta.batch():
+                for asset_type, d in dates.items():
+                    meta.set_update(asset_type, "day", d)
+        """
+        conn = self.conn
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.rollback()
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            with self.metrics.timer("sqlite_commit"):
+                conn.commit()
+
+    def _write(self, table, sql, args, many=False):
+        """Run one write statement on `table`, which tags its `sqlite_write` timer."""
+        conn = self.conn
+        with self.metrics.timer("sqlite_write", table=table):
+            if many:
+                cur = conn.executemany(sql, args)
+            else:
+                cur = conn.execute(sql, args)
+            if self._local.depth == 0:
+                conn.commit()
+        return cur
 
     def get(self, asset_type, period):
         cur = self.conn.execute(
@@ -63,13 +245,201 @@ class MetadataStore:
     """
 
     def set_update(self, asset_type, period, date):
-        self.conn.execute("""
-          INSERT INTO updates(asset_type,period,last_date)
-            VALUES(?,?,?)
-          ON CONFLICT(asset_type,period) DO UPDATE SET last_date=excluded.last_date
-        """, (asset_type, period, date.isoformat()))
-        self.conn.commit()
+        with self.batch():
+            self._write("updates", """
+              INSERT INTO updates(asset_type,period,last_date)
+                VALUES(?,?,?)
+              ON CONFLICT(asset_type,period) DO UPDATE SET last_date=excluded.last_date
+            """, (asset_type, period, date.isoformat()))
+            if self.history:
+                self._write("update_history", """
+                  INSERT INTO update_history(asset_type,period,last_date,recorded_at)
+                    VALUES(?,?,?,?)
+                """, (asset_type, period, date.isoformat(), datetime.now().isoformat(timespec="seconds")))
 
     def set_full(self, asset_type, ticker_range, date):
         key = f"full_{ticker_range}"
-        self.set_update(asset_type, key, date)
\ No newline at end of file
+        self.set_update(asset_type, key, date)
+
+    def get_history(self, asset_type, period):
+        """`[(last_date, recorded_at), ...]` oldest first; empty unless `history=True`."""
+        return self.conn.execute(
+          "SELECT last_date, recorded_at FROM update_history WHERE asset_type=? AND period=? ORDER BY rowid",
+          (asset_type, period)
+        ).fetchall()
+
+    def get_archive(self, key):
+        """`{"etag", "last_modified", "sha256"}` of the last extracted archive `key`, or `None`."""
+        row = self.conn.execute(
+          "SELECT etag, last_modified, sha256 FROM archives WHERE key=?", (key,)
+        ).fetchone()
+        return dict(zip(("etag", "last_modified", "sha256"), row)) if row else None
+
+    def set_archive(self, key, etag, last_modified, sha256):
+        self._write("archives", """
+          INSERT OR REPLACE INTO archives(key,etag,last_modified,sha256,updated_at)
+            VALUES(?,?,?,?,?)
+        """, (key, etag, last_modified, sha256, datetime.now().isoformat(timespec="seconds")))
+
+    def get_members(self, directory):
+        """`{path: (crc, size)}` for every recorded member below `directory`."""
+        rows = self.conn.execute(
+          "SELECT path, crc, size FROM members WHERE path >= ? AND path < ?", self._under(directory)
+        ).fetchall()
+        return {path: (crc, size) for path, crc, size in rows}
+
+    def record_members(self, rows):
+        """Upsert `(path, crc, size)` rows for freshly extracted members."""
+        self._write("members", "INSERT OR REPLACE INTO members(path,crc,size) VALUES(?,?,?)",
+                    rows, many=True)
+
+    def record_files(self, asset_type, paths, timeframe=None):
+        """Scan extracted bar files and upsert their manifest rows."""
+        rows = []
+        for path in map(Path, paths):
+            if not path.is_file():
+                continue
+            stats = file_stats(path)
+            rows.append((str(path.resolve()), asset_type, symbol_from_name(path.name), timeframe,
+                         stats["min_ts"], stats["max_ts"], stats["rows"], stats["bytes"],
+                         stats["checksum"]))
+        self._write("manifest", """
+          INSERT OR REPLACE INTO manifest(path,asset_type,symbol,timeframe,min_ts,max_ts,rows,bytes,checksum)
+            VALUES(?,?,?,?,?,?,?,?,?)
+        """, rows, many=True)
+        return len(rows)
+
+    def on_extract(self, endpoint, params, paths):
+        """`FrdClient.extract_hooks` adapter: index the members of `data_file` archives."""
+        if endpoint == "data_file":
+            self.record_files(params["type"], paths, params.get("timeframe"))
+
+    def file_info(self, path):
+        """Manifest row for `path` as a dict, or `None` if it was never recorded."""
+        row = self.conn.execute(
+          f"SELECT {','.join(MANIFEST_COLUMNS)} FROM manifest WHERE path=?",
+          (str(Path(path).resolve()),)
+        ).fetchone()
+        return dict(zip(MANIFEST_COLUMNS, row)) if row else None
+
+    @staticmethod
+    def _under(directory):
+        """`(lo, hi)` bounds of the paths below `directory`: a prefix scan on the primary key."""
+        prefix = str(directory).rstrip("/") + "/"
+        # "0" sorts right after "/"
+        return prefix, prefix[:-1] + "0"
+
+    def has_files(self, directory) -> bool:
+        """Whether any manifest row lies below `directory`."""
+        return self.conn.execute(
+          "SELECT 1 FROM manifest WHERE path >= ? AND path < ? LIMIT 1", self._under(directory)
+        ).fetchone() is not None
+
+    def find_files(self, asset_type=None, symbols=None, timeframe=None, start=None, end=None,
+                   under=None):
+        """
+        Manifest rows (dicts) of the files that can hold bars matching every
+        given filter: `start` inclusive, `end` exclusive, both compared with
+        the files' `[min_ts, max_ts]` span as ISO strings, and `under` a
+        resolved directory the files must lie below.
+        """
+        where, args = [], []
+        if under is not None:
+            where.append("path >= ? AND path < ?")
+            args += self._under(under)
+        if asset_type is not None:
+            where.append("asset_type=?")
+            args.append(asset_type)
+        if symbols is not None:
+            symbols = list(symbols)
+            where.append(f"symbol IN ({','.join('?' * len(symbols))})")
+            args += symbols
+        if timeframe is not None:
+            where.append("timeframe=?")
+            args.append(timeframe)
+        if start is not None:
+            where.append("max_ts >= ?")
+            args.append(ts_key(start))
+        if end is not None:
+            where.append("min_ts < ?")
+            args.append(ts_key(end))
+        sql = f"SELECT {','.join(MANIFEST_COLUMNS)} FROM manifest"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        rows = self.conn.execute(sql + " ORDER BY symbol, min_ts", args).fetchall()
+        return [dict(zip(MANIFEST_COLUMNS, r)) for r in rows]
+
+    def record_actions(self, rows) -> set:
+        """
+        Upsert `(symbol, date, type, value)` corporate actions and return the
+        symbols whose actions actually changed.
+        """
+        rows = [(sym, str(d)[:10], kind, float(v)) for sym, d, kind, v in rows]
+        if not rows:
+            return set()
+        symbols = sorted({r[0] for r in rows})
+        known = {(s, d, t): v for s, d, t, v, _ in self.get_actions(symbols)}
+        changed = [r for r in rows if known.get(r[:3]) != r[3]]
+        self._write("actions", """
+          INSERT INTO actions(symbol,date,type,value) VALUES(?,?,?,?)
+            ON CONFLICT(symbol,date,type) DO UPDATE SET value=excluded.value
+        """, changed, many=True)
+        return {r[0] for r in changed}
+
+    def set_reference_closes(self, rows):
+        """Record `(symbol, date, ref_close)` for dividends: the last unadjusted close before the ex-date."""
+        self._write("actions",
+                    "UPDATE actions SET ref_close=? WHERE symbol=? AND date=? AND type='dividend'",
+                    [(ref, sym, d) for sym, d, ref in rows], many=True)
+
+    def get_actions(self, symbols=None):
+        """`[(symbol, date, type, value, ref_close), ...]` ordered by symbol and date."""
+        sql, args = "SELECT symbol, date, type, value, ref_close FROM actions", []
+        if symbols is not None:
+            symbols = list(symbols)
+            sql += f" WHERE symbol IN ({','.join('?' * len(symbols))})"
+            args = symbols
+        return self.conn.execute(sql + " ORDER BY symbol, date, type", args).fetchall()
+
+    def get_rolls(self, root, rule):
+        """Cached roll table of `root` under `rule`: `[(date, contract), ...]` by date."""
+        return self.conn.execute(
+          "SELECT date, contract FROM rolls WHERE root=? AND rule=? ORDER BY date",
+          (root, rule)
+        ).fetchall()
+
+    def set_rolls(self, root, rule, rows, since=None):
+        """Replace the cached rolls dated `since` or later (all if `None`) with `rows`."""
+        with self.batch():
+            self._write("rolls", "DELETE FROM rolls WHERE root=? AND rule=? AND date>=?",
+                        (root, rule, since or ""))
+            self._write("rolls", "INSERT INTO rolls(root,rule,date,contract) VALUES(?,?,?,?)",
+                        [(root, rule, d, c) for d, c in rows], many=True)
+
+    def acquire_lease(self, job, owner, ttl, now=None) -> bool:
+        """
+        Take (or renew) the lease on `job` for `ttl` seconds unless another
+        owner holds an unexpired one. Atomic across processes sharing the DB.
+        """
+        now = time.time() if now is None else now
+        with self.batch():
+            row = self.conn.execute("SELECT owner, expires FROM leases WHERE job=?", (job,)).fetchone()
+            if row is not None and row[0] != owner and row[1] > now:
+                return False
+            self._write("leases",
+                        "INSERT OR REPLACE INTO leases(job,owner,expires,acquired_at) VALUES(?,?,?,?)",
+                        (job, owner, now + ttl, datetime.now().isoformat(timespec="seconds")))
+        return True
+
+    def renew_lease(self, job, owner, ttl) -> bool:
+        """Extend a held lease; `False` if it expired and was taken over."""
+        cur = self._write("leases", "UPDATE leases SET expires=? WHERE job=? AND owner=?",
+                          (time.time() + ttl, job, owner))
+        return cur.rowcount == 1
+
+    def release_lease(self, job, owner):
+        self._write("leases", "DELETE FROM leases WHERE job=? AND owner=?", (job, owner))
+
+    def get_lease(self, job):
+        """`(owner, expires)` of the lease on `job`, or `None`."""
+        return self.conn.execute("SELECT owner, expires FROM leases WHERE job=?", (job,)).fetchone()
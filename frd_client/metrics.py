@@ -0,0 +1,169 @@
+"""
+Opt-in instrumentation: timers and byte counters tagged with endpoint,
+asset type and period, exportable as a Prometheus text file or a JSON trace
+(Chrome `about:tracing` / Perfetto format), plus per-run profiling.
+
+    metrics = Metrics(trace=True, profile_dir="profiles")
+    client = FrdClient(userid, work_dir, meta=MetadataStore(db, metrics=metrics), metrics=metrics)
+    UpdateScheduler(client, meta).run_daily()
+    metrics.write_prometheus("frd.prom")
+    metrics.write_trace("frd_trace.json")
+
+Components default to `NULL_METRICS`, whose timers are shared no-op
+context managers.
+"""
+import cProfile, json, os, re, threading, time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+_NAME = re.compile(r"[^a-zA-Z0-9_]")
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Metrics:
+    def __init__(self, prefix: str = "frd", trace: bool = False, profile_dir: Path = None,
+                 profiler=None):
+        """
+        Timers accumulate count/sum/max seconds and counters a running total,
+        both per name and tag set. With `trace=True` every timed span is also
+        kept as a trace event. `profile_dir` turns on `profiled()`: each run
+        is recorded with cProfile (or with `profiler(path)`, a context manager
+        factory for a sampling profiler) and dumped there.
+        """
+        self.prefix = prefix
+        self.trace = trace
+        self.profile_dir = None if profile_dir is None else Path(profile_dir)
+        self.profiler = profiler
+        self._timers = {}    # (name, tags) -> [count, sum, max]
+        self._counters = {}  # (name, tags) -> total
+        self._events = []
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    @staticmethod
+    def _key(name, tags):
+        return name, tuple(sorted((k, str(v)) for k, v in tags.items() if v is not None))
+
+    def observe(self, name: str, seconds: float, start: float = None, **tags):
+        key = self._key(name, tags)
+        with self._lock:
+            stat = self._timers.setdefault(key, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+            if self.trace and start is not None:
+                self._events.append({
+                    "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+                    "ts": round((start - self._t0) * 1e6), "dur": round(seconds * 1e6),
+                    "args": dict(key[1]),
+                })
+
+    @contextmanager
+    def timer(self, name: str, **tags):
+        """Time the block as `name`; recorded even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, start, **tags)
+
+    def count(self, name: str, value: float = 1, **tags):
+        key = self._key(name, tags)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    @contextmanager
+    def profiled(self, name: str):
+        """Profile the block into `profile_dir/<name>-<time>.prof`; a no-op without `profile_dir`."""
+        if self.profile_dir is None:
+            yield
+            return
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        path = self.profile_dir / f"{name}-{time.strftime('%Y%m%dT%H%M%S')}.prof"
+        if self.profiler is not None:
+            with self.profiler(path):
+                yield
+            return
+        # cProfile only sees the calling thread; profile with max_workers=1
+        # or pass a sampling profiler to cover worker threads
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            yield
+        finally:
+            prof.disable()
+            prof.dump_stats(path)
+
+    def snapshot(self) -> dict:
+        """`{"timers": [...], "counters": [...]}` with one dict per name and tag set."""
+        with self._lock:
+            return {
+                "timers": [{"name": n, "tags": dict(t), "count": c, "sum": s, "max": m}
+                           for (n, t), (c, s, m) in self._timers.items()],
+                "counters": [{"name": n, "tags": dict(t), "value": v}
+                             for (n, t), v in self._counters.items()],
+            }
+
+    def prometheus(self) -> str:
+        """The current values in the Prometheus text exposition format."""
+        snap = self.snapshot()
+        lines, typed = [], set()
+        def series(metric, tags, value):
+            labels = ",".join(f'{k}="{_label(v)}"' for k, v in sorted(tags.items()))
+            lines.append(f"{metric}{{{labels}}} {value}" if labels else f"{metric} {value}")
+        families = {}
+        for t in sorted(snap["timers"], key=lambda t: (t["name"], sorted(t["tags"].items()))):
+            families.setdefault(f"{self.prefix}_{_NAME.sub('_', t['name'])}_seconds", []).append(t)
+        # each family's lines must be contiguous, so `_max` follows the whole summary
+        for base, timers in families.items():
+            typed.add(base)
+            lines.append(f"# TYPE {base} summary")
+            for t in timers:
+                series(f"{base}_count", t["tags"], t["count"])
+                series(f"{base}_sum", t["tags"], repr(t["sum"]))
+            lines.append(f"# TYPE {base}_max gauge")
+            for t in timers:
+                series(f"{base}_max", t["tags"], repr(t["max"]))
+        for c in sorted(snap["counters"], key=lambda c: (c["name"], sorted(c["tags"].items()))):
+            metric = f"{self.prefix}_{_NAME.sub('_', c['name'])}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            series(metric, c["tags"], c["value"])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path):
+        """Write `prometheus()` atomically, e.g. for node_exporter's textfile collector."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(self.prometheus())
+        os.replace(tmp, path)
+
+    def write_trace(self, path: Path):
+        """Write the recorded spans (needs `trace=True`) as a Chrome trace JSON file."""
+        with self._lock:
+            events = list(self._events)
+        Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}))
+
+    def reset(self):
+        with self._lock:
+            self._timers.clear()
+            self._counters.clear()
+            self._events.clear()
+
+class NullMetrics(Metrics):
+    """Drops everything; the default for components built without `metrics`."""
+    def observe(self, name, seconds, start=None, **tags):
+        pass
+
+    def timer(self, name, **tags):
+        return nullcontext()
+
+    def count(self, name, value=1, **tags):
+        pass
+
+    def profiled(self, name):
+        return nullcontext()
+
+NULL_METRICS = NullMetrics()
@@ -0,0 +1,125 @@
+"""
+Cross-asset panels: many bar series aligned as-of onto one clock.
+
+A `Clock` is a bar frequency, a daily session, a weekday rule and a time
+zone (`CLOCKS["nyse_1min"]`, `CLOCKS["utc_1min"]`, ...). `Panel` looks up,
+for every clock tick and source, the last bar completed by the tick with a
+binary search over the source's sorted timestamps, and yields the result
+in time chunks so that only one chunk of the panel is in memory at once.
+FirstRate stamps bars with their open time, so a bar stamped `t` only
+counts from `t + bar_width`; reading it at `t` would leak its close.
+Sources are usually memory-mapped `BarSeries`, so each chunk only pages in
+the bars it needs.
+"""
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from .resample import DAY, Session, SESSIONS, bucket_starts, parse_timeframe
+
+# FirstRate timestamps are US Eastern wall-clock times
+SOURCE_TZ = "America/New_York"
+
+@dataclass(frozen=True)
+class Clock:
+    freq: str = "1min"
+    session: Session = Session()
+    weekdays: bool = False
+    tz: str = "UTC"
+
+    def ticks(self, start, end) -> pd.DatetimeIndex:
+        """Tick times in `[start, end)` (wall-clock times in `tz`, returned tz-aware)."""
+        width, _ = parse_timeframe(self.freq)
+        start = pd.Timestamp(start).tz_localize(None).as_unit("ns").value
+        end = pd.Timestamp(end).tz_localize(None).as_unit("ns").value
+        first = start + (-(start - self.session.open_ns) % width)
+        ns = np.arange(first, end, width, dtype="int64")
+        _, inside = bucket_starts(ns, self.freq, self.session)
+        if self.weekdays:
+            # 1970-01-01 was a Thursday; label sessions by their closing day
+            day = (ns - self.session.open_ns) // DAY + self.session.label_shift
+            inside &= (day + 3) % 7 < 5
+        ticks = pd.DatetimeIndex(ns[inside].view("datetime64[ns]"))
+        return ticks.tz_localize(self.tz, ambiguous="NaT", nonexistent="NaT").dropna()
+
+CLOCKS = {
+    "nyse_1min": Clock("1min", SESSIONS["stock"], True, "America/New_York"),
+    "nyse_5min": Clock("5min", SESSIONS["stock"], True, "America/New_York"),
+    "utc_1min": Clock("1min", Session(), False, "UTC"),
+    "utc_1hour": Clock("1hour", Session(), False, "UTC"),
+}
+
+class Panel:
+    def __init__(self, sources: dict, fields=("close",), tolerance=None, source_tz=SOURCE_TZ,
+                 bar_width: str = "1min", label: str = "open"):
+        """
+        `sources` maps column names to time-sorted `BarSeries` (or
+        `(BarSeries, tz)` pairs for sources not stamped in `source_tz`).
+        `label` says what the timestamps mark: `"open"` (FirstRate bars)
+        delays every bar by `bar_width` until it has closed, `"close"` uses
+        it from its timestamp on. A tick only takes a bar completed at most
+        `tolerance` (a timedelta) ago; older or missing values are NaN.
+        """
+        if label not in ("open", "close"):
+            raise ValueError(f"unknown bar label {label!r}")
+        self.names = list(sources)
+        self.sources = [s if isinstance(s, tuple) else (s, source_tz) for s in sources.values()]
+        self.fields = list(fields)
+        self.tolerance = None if tolerance is None else pd.Timedelta(tolerance).value
+        self.delay = parse_timeframe(bar_width)[0] if label == "open" else 0
+
+    @classmethod
+    def from_store(cls, store, items, period: str = "history", timeframe: str = "1min", **kwargs):
+        """
+        Panel over `SeriesStore` series; `items` are `(asset_type, symbol)`
+        pairs, named by symbol (or `asset_type:symbol` where symbols repeat).
+        `bar_width` defaults to `timeframe`.
+        """
+        kwargs.setdefault("bar_width", timeframe)
+        items = list(items)
+        symbols = [s for _, s in items]
+        sources = {}
+        for asset_type, symbol in items:
+            name = symbol if symbols.count(symbol) == 1 else f"{asset_type}:{symbol}"
+            sources[name] = store.open(asset_type, period, timeframe, symbol)
+        return cls(sources, **kwargs)
+
+    def align(self, ticks: pd.DatetimeIndex) -> pd.DataFrame:
+        """One frame indexed by `ticks` with `(field, name)` columns."""
+        if ticks.tz is None:
+            ticks = ticks.tz_localize(self.sources[0][1] if self.sources else "UTC")
+        out = {f: np.full((len(ticks), len(self.names)), np.nan) for f in self.fields}
+        local = {}
+        for j, (series, tz) in enumerate(self.sources):
+            if tz not in local:
+                local[tz] = ticks.tz_convert(tz).tz_localize(None).as_unit("ns").asi8
+            # the latest bar stamp whose bar has closed by each tick
+            at = local[tz] - self.delay
+            ts = series.timestamp
+            if len(ts) == 0:
+                continue
+            idx = np.searchsorted(ts, at, "right") - 1
+            ok = idx >= 0
+            if self.tolerance is not None:
+                ok &= at - np.asarray(ts[np.maximum(idx, 0)]) <= self.tolerance
+            rows = idx[ok]
+            for f in self.fields:
+                out[f][ok, j] = getattr(series, f)[rows]
+        columns = pd.MultiIndex.from_product([self.fields, self.names], names=["field", "symbol"])
+        data = np.concatenate([out[f] for f in self.fields], axis=1) if self.fields else None
+        return pd.DataFrame(data, index=ticks, columns=columns)
+
+    def iter_chunks(self, clock: Clock, start, end, chunk="7D"):
+        """Yield aligned frames covering `[start, end)` on `clock`, one per `chunk` of time."""
+        start, end, step = pd.Timestamp(start), pd.Timestamp(end), pd.Timedelta(chunk)
+        lo = start
+        while lo < end:
+            hi = min(lo + step, end)
+            ticks = clock.ticks(lo, hi)
+            if len(ticks):
+                yield self.align(ticks)
+            lo = hi
+
+    def to_frame(self, clock: Clock, start, end, chunk="7D") -> pd.DataFrame:
+        """The whole panel in memory; prefer `iter_chunks` for long ranges."""
+        frames = list(self.iter_chunks(clock, start, end, chunk))
+        return pd.concat(frames) if frames else self.align(clock.ticks(start, start))
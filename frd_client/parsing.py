@@ -0,0 +1,90 @@
+"""
+Parsing of FirstRate Data bar files.
+
+Data files are headerless CSVs of `timestamp,open,high,low,close,volume`
+named like `AAPL_1min.txt` or `AAPL_full_1min_adjsplitdiv.txt`. Files that
+do start with a header row are read with their own column names.
+"""
+import zlib
+from pathlib import PurePath
+import pandas as pd
+
+BAR_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
+BAR_DTYPES = {
+    "open": "float32",
+    "high": "float32",
+    "low": "float32",
+    "close": "float32",
+    # crypto volumes are fractional
+    "volume": "float64",
+}
+
+def symbol_from_name(name: str) -> str:
+    """`"stock/day/AAPL_1min.txt"` -> `"AAPL"`."""
+    return PurePath(name).stem.split("_")[0]
+
+def read_bars(fh, chunksize: int = None, usecols=None):
+    """
+    Parse a bar file from a path or a seekable binary/text file object.
+    Returns a DataFrame, or an iterator of DataFrames of at most
+    `chunksize` rows, with `BAR_DTYPES` applied and `timestamp` parsed.
+    """
+    if isinstance(fh, (str, PurePath)):
+        with open(fh, "rb") as f:
+            first = f.readline()
+    else:
+        first = fh.readline()
+        fh.seek(0)
+    if isinstance(first, bytes):
+        first = first.decode("utf-8", "replace")
+    fields = first.strip().split(",")
+    header = not first[:1].isdigit()
+    names = None
+    if header:
+        columns = fields
+    else:
+        extra = [f"col{i}" for i in range(len(BAR_COLUMNS), len(fields))]
+        columns = names = BAR_COLUMNS[:len(fields)] + extra
+    if usecols is not None:
+        columns = [c for c in columns if c in usecols]
+    return pd.read_csv(
+        fh,
+        header=0 if header else None,
+        names=names,
+        usecols=None if usecols is None else columns,
+        dtype={c: t for c, t in BAR_DTYPES.items() if c in columns},
+        parse_dates=["timestamp"] if "timestamp" in columns else None,
+        chunksize=chunksize,
+    )
+
+def file_stats(path) -> dict:
+    """
+    Summarise a bar file in one pass over its bytes without parsing it:
+    row count, byte size, CRC32 (as in a ZIP central directory) and the
+    first/last timestamps as written. FirstRate files are sorted by time,
+    so these are the min and max.
+    """
+    crc, rows, size, last = 0, 0, 0, b""
+    with open(path, "rb") as fh:
+        first = fh.readline()
+        header = not first[:1].isdigit()
+        second = fh.readline() if header else b""
+        fh.seek(0)
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            crc = zlib.crc32(block, crc)
+            rows += block.count(b"\n")
+            size += len(block)
+            last = (last + block)[-4096:]
+    if last and not last.endswith(b"\n"):
+        rows += 1
+    lines = last.rstrip(b"\r\n").rsplit(b"\n", 1)
+    head = second if header else first
+    if header:
+        rows -= 1
+    return {
+        "rows": max(rows, 0),
+        "bytes": size,
+        "checksum": f"{crc:08x}",
+        "min_ts": head.split(b",", 1)[0].decode().strip() or None,
+        "max_ts": lines[-1].split(b",", 1)[0].decode().strip() if rows > 0 else None,
+    }
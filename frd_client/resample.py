@@ -0,0 +1,143 @@
+"""
+Vectorized resampling of fine bars (normally 1min) into coarser timeframes.
+
+Buckets are aligned to each asset type's trading session: intraday buckets
+start at the session open, and daily bars are labelled with the session's
+trading date (the closing date for sessions that cross midnight, e.g. CME
+futures opening at 18:00). Bars outside the session are left out of the
+aggregate, so stock 1day bars cover regular hours only.
+
+`update` recomputes only the buckets touched by newly appended source bars,
+so deriving after a day/week update costs time proportional to the update.
+"""
+import re
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+from .series import BarSeries, FIELDS, write_tail
+
+MINUTE = 60 * 10**9
+DAY = 1440 * MINUTE
+DEFAULT_TIMEFRAMES = ("5min", "30min", "1hour", "1day")
+
+def _minutes(hhmm: str) -> int:
+    h, m = hhmm.split(":")
+    return int(h) * 60 + int(m)
+
+@dataclass(frozen=True)
+class Session:
+    """Daily trading session in exchange-local time; `close <= open` wraps past midnight."""
+    open: str = "00:00"
+    close: str = "00:00"
+
+    @property
+    def open_ns(self) -> int:
+        return _minutes(self.open) * MINUTE
+
+    @property
+    def length_ns(self) -> int:
+        length = (_minutes(self.close) - _minutes(self.open)) % 1440
+        return (length or 1440) * MINUTE
+
+    @property
+    def label_shift(self) -> int:
+        # sessions running past midnight belong to the day they close on
+        return 1 if self.open_ns + self.length_ns > DAY else 0
+
+SESSIONS = {
+    "stock": Session("09:30", "16:00"),
+    "etf": Session("09:30", "16:00"),
+    "index": Session("09:30", "16:00"),
+    "futures": Session("18:00", "17:00"),
+    "fx": Session("17:00", "17:00"),
+    "crypto": Session("00:00", "00:00"),
+}
+
+def parse_timeframe(timeframe: str):
+    """`"30min"` -> `(30 * MINUTE, False)`; `"1day"` -> `(DAY, True)`."""
+    m = re.fullmatch(r"(\d+)(min|hour|day)", timeframe)
+    if not m:
+        raise ValueError(f"unsupported timeframe {timeframe!r}")
+    n, unit = int(m.group(1)), m.group(2)
+    if unit == "day":
+        return n * DAY, True
+    return n * (60 if unit == "hour" else 1) * MINUTE, False
+
+def bucket_starts(timestamp, timeframe: str, session: Session):
+    """
+    Bucket timestamp for every bar (int64 ns) and a mask of the bars that
+    fall inside the session.
+    """
+    width, daily = parse_timeframe(timeframe)
+    shifted = np.asarray(timestamp, dtype="int64") - session.open_ns
+    day = shifted // DAY
+    offset = shifted - day * DAY
+    inside = offset < session.length_ns
+    if daily:
+        days = width // DAY
+        return (day + session.label_shift) // days * days * DAY, inside
+    return day * DAY + session.open_ns + offset // width * width, inside
+
+def _aggregate(series: BarSeries, keys) -> BarSeries:
+    if len(keys) == 0:
+        return BarSeries(*(np.asarray(getattr(series, f))[:0] for f in FIELDS))
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+    return BarSeries(
+        keys[starts],
+        np.asarray(series.open)[starts],
+        np.maximum.reduceat(series.high, starts),
+        np.minimum.reduceat(series.low, starts),
+        np.asarray(series.close)[ends],
+        np.add.reduceat(series.volume, starts),
+    )
+
+def resample(series: BarSeries, timeframe: str, session: Session = Session()) -> BarSeries:
+    """Aggregate time-sorted `series` into `timeframe` bars."""
+    keys, inside = bucket_starts(series.timestamp, timeframe, session)
+    if not inside.all():
+        series = BarSeries(*(np.asarray(getattr(series, f))[inside] for f in FIELDS))
+        keys = keys[inside]
+    return _aggregate(series, keys)
+
+def update(derived: BarSeries, source: BarSeries, timeframe: str, session: Session = Session()):
+    """
+    Bring `derived` (bars previously resampled from `source`, or from an
+    earlier batch it replaced, as with the daily `day` download) up to date.
+    Returns `(keep, fresh)`: the first `keep` rows of `derived` are
+    unchanged and `fresh` replaces everything after them. Only source bars
+    from the last derived bucket onwards are read, and derived buckets the
+    source no longer covers are kept.
+    """
+    if derived is None or len(derived) == 0:
+        return 0, resample(source, timeframe, session)
+    last = int(derived.timestamp[-1])
+    width, daily = parse_timeframe(timeframe)
+    # far enough back to include every bar of the last bucket, whatever the session
+    tail = source[int(np.searchsorted(source.timestamp, last - width - 2 * DAY)):]
+    keys, inside = bucket_starts(tail.timestamp, timeframe, session)
+    take = inside & (keys >= last)
+    fresh = _aggregate(BarSeries(*(np.asarray(getattr(tail, f))[take] for f in FIELDS)), keys[take])
+    if len(fresh) == 0:
+        return len(derived), fresh
+    return int(np.searchsorted(derived.timestamp, fresh.timestamp[0])), fresh
+
+def derive(source_dir: Path, target_dir: Path, timeframe: str, session: Session = Session()) -> int:
+    """
+    Incrementally refresh the saved series `target_dir` from the saved
+    source series; returns the number of rows rewritten or appended.
+    """
+    source = BarSeries.open(source_dir)
+    target_dir = Path(target_dir)
+    derived = BarSeries.open(target_dir) if (target_dir / "_meta.json").exists() else None
+    keep, fresh = update(derived, source, timeframe, session)
+    write_tail(target_dir, keep, fresh)
+    return len(fresh)
+
+def derive_all(store, asset_type: str, period: str, symbol: str, source: str = "1min",
+               timeframes=DEFAULT_TIMEFRAMES) -> dict:
+    """Derive each of `timeframes` from the `source` series of one symbol in a `SeriesStore`."""
+    session = SESSIONS.get(asset_type, Session())
+    src = store.path(asset_type, period, source, symbol)
+    return {tf: derive(src, store.path(asset_type, period, tf, symbol), tf, session)
+            for tf in timeframes}
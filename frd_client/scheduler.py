@@ -1,4 +1,10 @@
-from datetime import date
+import logging, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass
+from .instruments.base import RemoteDateCache
+from .leases import LeaseLost, job_name
+from .metrics import NULL_METRICS
 from .instruments.stock import StockHandler
 from .instruments.etf import EtfHandler
 from .instruments.futures import FuturesHandler
@@ -6,34 +12,143 @@ from .instruments.index import IndexHandler
 from .instruments.fx import FxHandler
 from .instruments.crypto import CryptoHandler
 
+log = logging.getLogger(__name__)
+
+# download_update kwargs per asset type; crypto and fx take no adjustment
+DEFAULT_KWARGS = {"timeframe": "1day", "adjustment": "adj_splitdiv"}
+UPDATE_KWARGS = {
+  "crypto": {"timeframe": "1day"},
+  "fx": {"timeframe": "1day"},
+}
+
+@dataclass
+class RunResult:
+    """Outcome of one handler within a scheduler run."""
+    asset_type: str
+    period: str
+    status: str              # "ran", "skipped", "leased" (by another runner) or "failed"
+    elapsed: float           # seconds spent probing and downloading
+    error: Exception = None
+
 class UpdateScheduler:
-    def __init__(self, client, meta):
+    HANDLERS = {
+      "stock": StockHandler,
+      "etf": EtfHandler,
+      "futures": FuturesHandler,
+      "index": IndexHandler,
+      "fx": FxHandler,
+      "crypto": CryptoHandler,
+    }
+    # {asset_type: handler instance}, built per scheduler in __init__
+    handlers = {}
+
+    def __init__(self, client, meta, max_workers=1, max_downloads=None, remote_ttl=300,
+                 adjustment=None, leases=None):
+        """
+        `max_workers > 1` runs the handlers concurrently on a thread pool, so a
+        run takes about as long as the slowest asset class. `max_downloads`
+        caps the number of `download_update` calls in flight at once across
+        all handlers (defaults to `max_workers`); probes are not limited.
+
+        All handlers share `remote_cache`, which is cleared and refilled by
+        `prefetch_remote_updates` at the start of every run.
+
+        `adjustment` replaces the default `adj_splitdiv` for the asset types
+        that take one, e.g. `"UNADJUSTED"` to download raw bars once and adjust
+        them locally with `adjust.AdjustmentEngine`.
+
+        With a `leases.JobQueue` as `leases`, each `asset_type/period` update
+        is leased in the shared `MetadataStore` first, so overlapping runs on
+        other processes or hosts skip it (status "leased") instead of
+        downloading it again. A runner that loses its lease mid-download
+        stops before extracting or recording it and also reports "leased".
+
+        Runs are timed and, if the client's `metrics` has a `profile_dir`,
+        profiled into it.
+        """
         self.client = client
         self.meta   = meta
-        self.handlers = {
-          "stock": StockHandler(client, meta),
-          "etf": EtfHandler(client, meta),
-          "futures": FuturesHandler(client, meta),
-          "index": IndexHandler(client, meta),
-          "fx": FxHandler(client, meta),
-          "crypto": CryptoHandler(client, meta),
-        }
+        self.metrics = getattr(client, "metrics", NULL_METRICS)
+        self.adjustment = adjustment
+        self.leases = leases
+        self.max_workers = max_workers
+        self.max_downloads = max_downloads or max_workers
+        self._downloads = threading.BoundedSemaphore(self.max_downloads)
+        self.remote_cache = RemoteDateCache(remote_ttl)
+        self.handlers = {t: cls(client, meta, self.remote_cache) for t, cls in self.HANDLERS.items()}
+
+    def prefetch_remote_updates(self, full=False):
+        """
+        Probe `last_update` for every handler at once and return
+        `{asset_type: date}`. Failed probes are left out; the handler retries
+        (and reports) them when it is run.
+        """
+        def probe(item):
+            t, h = item
+            try:
+                return t, h.last_remote_update(full=full)
+            except Exception:
+                log.warning("%s last_update probe failed", t, exc_info=True)
+                return t, None
+        with ThreadPoolExecutor(max_workers=max(len(self.handlers), 1)) as pool:
+            return {t: d for t, d in pool.map(probe, self.handlers.items()) if d is not None}
+
+    def update_kwargs(self, asset_type) -> dict:
+        kwargs = dict(UPDATE_KWARGS.get(asset_type, DEFAULT_KWARGS))
+        if self.adjustment is not None and "adjustment" in kwargs:
+            kwargs["adjustment"] = self.adjustment
+        return kwargs
+
+    def _lease(self, asset_type, period):
+        """Lease on the update job, or a stand-in that is always held without `leases`."""
+        if self.leases is None:
+            return nullcontext(True)
+        return self.leases.lease(job_name(asset_type, period))
+
+    def _update(self, asset_type, handler, period):
+        start = time.perf_counter()
+        try:
+            if not handler.needs_update(period):
+                return RunResult(asset_type, period, "skipped", time.perf_counter() - start)
+            with self._lease(asset_type, period) as held:
+                if held is None:
+                    return RunResult(asset_type, period, "leased", time.perf_counter() - start)
+                # the previous holder may have finished it in the meantime
+                if self.leases is not None and not handler.needs_update(period):
+                    return RunResult(asset_type, period, "skipped", time.perf_counter() - start)
+                lease = None if self.leases is None else held
+                with self._downloads:
+                    handler.download_update(period=period, lease=lease, **self.update_kwargs(asset_type))
+        except LeaseLost:
+            log.warning("%s %s lease lost; left to the runner that took it over", asset_type, period)
+            return RunResult(asset_type, period, "leased", time.perf_counter() - start)
+        except Exception as e:
+            # one failing asset class must not abort the rest of the run
+            log.exception("%s %s update failed", asset_type, period)
+            return RunResult(asset_type, period, "failed", time.perf_counter() - start, e)
+        return RunResult(asset_type, period, "ran", time.perf_counter() - start)
+
+    def _record(self, results):
+        for r in results:
+            self.metrics.count("handler_runs", asset_type=r.asset_type, period=r.period, status=r.status)
+        return results
+
+    def _run(self, period):
+        with self.metrics.profiled(f"run_{period}"), self.metrics.timer("run", period=period):
+            self.remote_cache.clear()
+            with self.metrics.timer("probe", period=period):
+                self.prefetch_remote_updates()
+            items = list(self.handlers.items())
+            if self.max_workers <= 1:
+                return self._record([self._update(t, h, period) for t, h in items])
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                return self._record(list(pool.map(lambda item: self._update(*item, period), items)))
 
     def run_daily(self):
-        for t, h in self.handlers.items():
-            if h.needs_update("day"):
-                h.download_update(period="day", timeframe="1day", adjustment="adj_splitdiv")
+        return self._run("day")
 
     def run_weekly(self):
-        for t, h in self.handlers.items():
-            remote = h.last_remote_update(full=False)
-            local  = self.meta.get(t, "week")
-            if local is None or remote > date.fromisoformat(local):
-                h.download_update(period="week", timeframe="1day", adjustment="adj_splitdiv")
+        return self._run("week")
 
     def run_monthly(self):
-        for t, h in self.handlers.items():
-            remote = h.last_remote_update(full=False)
-            local  = self.meta.get(t, "month")
-            if local is None or remote > date.fromisoformat(local):
-                h.download_update(period="month", timeframe="1day", adjustment="adj_splitdiv")
\ No newline at end of file
+        return self._run("month")
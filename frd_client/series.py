@@ -0,0 +1,249 @@
+"""
+Compact, array-backed bar series and their memory-mapped on-disk layout.
+
+A series on disk is a directory holding one raw little-endian array per
+column plus a small JSON header:
+
+    AAPL/
+        _meta.json      {"rows": n, "columns": {"timestamp": "<i8", "open": "<f4", ...}}
+        timestamp.bin   int64 nanoseconds since the epoch (exchange-local, as downloaded)
+        open.bin high.bin low.bin close.bin
+        volume.bin      int64, or float64 where volumes are fractional (crypto)
+
+`BarSeries.open` maps the columns with `np.memmap`, so many processes share
+one page-cached copy and time slices are zero-copy views.
+"""
+import json, os, shutil, uuid
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from .parsing import read_bars, symbol_from_name
+
+FIELDS = ("timestamp", "open", "high", "low", "close", "volume")
+PRICES = ("open", "high", "low", "close")
+
+def _to_ns(value) -> int:
+    return pd.Timestamp(value).as_unit("ns").value
+
+class BarSeries:
+    def __init__(self, timestamp, open, high, low, close, volume):
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, key):
+        """Row slice as a view on the same arrays (or memory map)."""
+        if not isinstance(key, slice):
+            raise TypeError("BarSeries only supports slicing")
+        return BarSeries(*(getattr(self, f)[key] for f in FIELDS))
+
+    def columns(self) -> dict:
+        return {f: getattr(self, f) for f in FIELDS}
+
+    def between(self, start=None, end=None) -> "BarSeries":
+        """Bars with `start <= timestamp < end`, found by binary search; no copy."""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamp, _to_ns(start), "left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamp, _to_ns(end), "left"))
+        return self[lo:hi]
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, price_dtype="float32") -> "BarSeries":
+        """Build from a `read_bars` frame; volume stays int64 unless it is fractional."""
+        ts = df["timestamp"].to_numpy().astype("datetime64[ns]").view("int64")
+        volume = df["volume"].to_numpy(dtype="float64")
+        if np.all(np.mod(volume, 1) == 0):
+            volume = volume.astype("int64")
+        return cls(ts, *(df[p].to_numpy(dtype=price_dtype) for p in PRICES), volume)
+
+    def to_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.columns())
+        df["timestamp"] = pd.to_datetime(np.asarray(self.timestamp), unit="ns")
+        return df
+
+    def save(self, directory: Path):
+        """
+        Write the series to `directory`. Columns go to new files renamed over
+        the old ones, and the header is replaced last, so existing mappings
+        keep their data and readers never see a torn write.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        arrays = {}
+        for f in FIELDS:
+            arr = np.ascontiguousarray(getattr(self, f))
+            arrays[f] = arr.astype(arr.dtype.newbyteorder("<"), copy=False)
+        _replace_columns(directory, {f: arr.tofile for f, arr in arrays.items()})
+        _write_meta(directory, {"rows": len(self), "columns": {f: a.dtype.str for f, a in arrays.items()}})
+
+    @classmethod
+    def open(cls, directory: Path, mode: str = "r") -> "BarSeries":
+        """Memory-map a saved series (read-only by default)."""
+        directory = Path(directory)
+        meta = json.loads((directory / "_meta.json").read_text())
+        rows = meta["rows"]
+        arrays = []
+        for f in FIELDS:
+            dtype = np.dtype(meta["columns"][f])
+            if rows == 0:
+                arrays.append(np.empty(0, dtype))
+            else:
+                arrays.append(np.memmap(directory / f"{f}.bin", dtype=dtype, mode=mode, shape=(rows,)))
+        return cls(*arrays)
+
+def _replace_columns(directory: Path, writers: dict):
+    """
+    Call `writers[field](path)` to fill a fresh file per column, then rename
+    them all over `<field>.bin`. Open memory maps keep the old inodes, so
+    they are never truncated or rewritten under a reader.
+    """
+    tag = uuid.uuid4().hex
+    tmps = {f: directory / f".{f}.bin.{tag}.tmp" for f in writers}
+    try:
+        for f, write in writers.items():
+            write(tmps[f])
+        for f, tmp in tmps.items():
+            os.replace(tmp, directory / f"{f}.bin")
+    finally:
+        for tmp in tmps.values():
+            if tmp.exists():
+                tmp.unlink()
+
+def _write_meta(directory: Path, meta: dict):
+    tmp = directory / "_meta.json.tmp"
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, directory / "_meta.json")
+
+def write_tail(directory: Path, start: int, series: BarSeries):
+    """
+    Replace rows `start:` of the saved series in `directory` with `series`.
+    A pure append extends the column files past the rows readers can see
+    and then publishes them through the header, so its cost follows the
+    size of the change. Replacing stored rows copies the kept prefix into
+    new files renamed into place (see `save`), so open mappings are never
+    truncated. Creates the series if missing.
+    """
+    directory = Path(directory)
+    if not (directory / "_meta.json").exists():
+        series.save(directory)
+        return
+    meta = json.loads((directory / "_meta.json").read_text())
+    rows = meta["rows"]
+    start = min(start, rows)
+    stored = {f: np.dtype(meta["columns"][f]) for f in FIELDS}
+    arrays = {}
+    for f, dtype in stored.items():
+        arr = np.asarray(getattr(series, f))
+        if f == "volume" and arr.dtype.kind == "f" and dtype.kind == "i":
+            # fractional volumes arrived: widen the stored column
+            dtype = arr.dtype.newbyteorder("<")
+            meta["columns"][f] = dtype.str
+        arrays[f] = np.ascontiguousarray(arr, dtype=dtype)
+    widened = {f for f in FIELDS if arrays[f].dtype != stored[f]}
+    if start == rows and not widened:
+        for f, arr in arrays.items():
+            with open(directory / f"{f}.bin", "r+b") as fh:
+                # drop leftovers of an interrupted append; no reader maps past `rows`
+                fh.truncate(rows * arr.itemsize)
+                fh.seek(0, os.SEEK_END)
+                arr.tofile(fh)
+    else:
+        def writer(f, arr):
+            def write(tmp):
+                src = directory / f"{f}.bin"
+                if f in widened:
+                    np.fromfile(src, dtype=stored[f], count=start).astype(arr.dtype).tofile(tmp)
+                else:
+                    shutil.copyfile(src, tmp)
+                    os.truncate(tmp, start * arr.itemsize)
+                with open(tmp, "ab") as fh:
+                    arr.tofile(fh)
+            return write
+        _replace_columns(directory, {f: writer(f, arr) for f, arr in arrays.items()})
+    meta["rows"] = start + len(series)
+    _write_meta(directory, meta)
+
+def merge_tail(directory: Path, series: BarSeries) -> int:
+    """
+    Merge `series` into the sorted, timestamp-unique saved series in
+    `directory`; bars in `series` replace stored bars with the same
+    timestamp. Only stored rows from the first new timestamp onwards are
+    read and rewritten. Returns the number of rows rewritten or appended.
+    """
+    directory = Path(directory)
+    if len(series) == 0:
+        return 0
+    ts = np.asarray(series.timestamp)
+    if (directory / "_meta.json").exists():
+        old = BarSeries.open(directory)
+        start = int(np.searchsorted(old.timestamp, ts.min(), "left"))
+        old = old[start:]
+    else:
+        start, old = 0, series[:0]
+    # new bars first, so np.unique's first-occurrence index prefers them
+    both = {f: np.concatenate([np.asarray(getattr(series, f)), np.asarray(getattr(old, f))])
+            for f in FIELDS}
+    _, first = np.unique(both["timestamp"], return_index=True)
+    merged = BarSeries(*(both[f][first] for f in FIELDS))
+    del old
+    write_tail(directory, start, merged)
+    return len(merged)
+
+class SeriesStore:
+    """
+    `BarSeries` directories under `root`, laid out as
+    `<asset_type>/<period>/<timeframe>/<symbol>` to mirror the downloads.
+    Register `on_extract` as a `FrdClient.extract_hooks` entry to write
+    every downloaded data file in this format as it lands. With
+    `history=True` each file is also merged into the symbol's canonical,
+    deduplicated history (see `merge`), so overlapping full/day/week/month
+    batches collapse into one series.
+    """
+    def __init__(self, root: Path, price_dtype="float32", history=False):
+        self.root = Path(root)
+        self.price_dtype = price_dtype
+        self.history = history
+
+    def path(self, asset_type, period, timeframe, symbol) -> Path:
+        return self.root / asset_type / period / timeframe / symbol
+
+    def history_path(self, asset_type, timeframe, symbol, adjustment=None) -> Path:
+        """Canonical series of a symbol; adjusted and unadjusted bars are kept apart."""
+        period = f"history_{adjustment}" if adjustment else "history"
+        return self.path(asset_type, period, timeframe, symbol)
+
+    def write(self, series: BarSeries, asset_type, period, timeframe, symbol):
+        series.save(self.path(asset_type, period, timeframe, symbol))
+
+    def open(self, asset_type, period, timeframe, symbol) -> BarSeries:
+        return BarSeries.open(self.path(asset_type, period, timeframe, symbol))
+
+    def symbols(self, asset_type, period, timeframe) -> list:
+        base = self.root / asset_type / period / timeframe
+        return sorted(p.name for p in base.iterdir() if (p / "_meta.json").exists()) if base.exists() else []
+
+    def convert(self, path: Path, asset_type, period, timeframe) -> BarSeries:
+        series = BarSeries.from_frame(read_bars(path), self.price_dtype)
+        self.write(series, asset_type, period, timeframe, symbol_from_name(Path(path).name))
+        return series
+
+    def merge(self, series: BarSeries, asset_type, timeframe, symbol, adjustment=None) -> int:
+        """Fold a batch of bars into the symbol's history, rewriting only the overlapping tail."""
+        return merge_tail(self.history_path(asset_type, timeframe, symbol, adjustment), series)
+
+    def on_extract(self, endpoint, params, paths):
+        """`FrdClient.extract_hooks` adapter: convert the members of `data_file` archives."""
+        if endpoint != "data_file":
+            return
+        timeframe = params.get("timeframe", "")
+        for path in paths:
+            if Path(path).stat().st_size:
+                series = self.convert(path, params["type"], params["period"], timeframe)
+                if self.history:
+                    self.merge(series, params["type"], timeframe, symbol_from_name(Path(path).name),
+                               params.get("adjustment"))
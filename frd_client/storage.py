@@ -0,0 +1,157 @@
+"""
+Columnar Parquet tier for downloaded bars.
+
+Extracted bar files are converted into one hive-partitioned Parquet dataset
+under `root`, laid out as
+`asset_type=<type>/timeframe=<tf>/adjustment=<adj>/symbol=<symbol>/year=<yyyy>/`
+with a single `part-0.parquet` per partition. Ingesting a file merges its
+rows into the partitions it touches, newer rows replacing older ones with
+the same timestamp, so overlapping `full`/`day`/`week` downloads never
+duplicate bars. Reads project columns and push predicates down to the
+partition paths and row-group statistics, so only the matching files are
+opened.
+
+Requires the optional `pyarrow` dependency (`pip install frd_client[parquet]`).
+"""
+import functools, logging, operator, os, re, uuid
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = ds = pq = None
+
+import pandas as pd
+from .parsing import BAR_COLUMNS, read_bars, symbol_from_name
+
+log = logging.getLogger(__name__)
+
+PART = "part-0.parquet"
+# partition value for asset types without adjustments (fx, crypto)
+NO_ADJUSTMENT = "none"
+_TIMEFRAME = re.compile(r"\d+(?:min|hour|day|week|month)")
+
+def timeframe_from_name(name: str) -> str:
+    """`"AAPL_full_1min_adjsplitdiv.txt"` -> `"1min"` (`"unknown"` if absent)."""
+    for part in Path(name).stem.split("_")[1:]:
+        if _TIMEFRAME.fullmatch(part):
+            return part
+    return "unknown"
+
+class ParquetStore:
+    """
+    Typed Parquet dataset of bars. Register `on_extract` as a
+    `FrdClient.extract_hooks` entry to convert every downloaded data file
+    as it lands, or call `ingest` on files that are already extracted.
+    """
+    def __init__(self, root: Path, batch_size: int = 1_000_000):
+        if pa is None:
+            raise ImportError("ParquetStore requires pyarrow: pip install frd_client[parquet]")
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.bar_schema = pa.schema([
+            ("timestamp", pa.timestamp("us")),
+            ("open", pa.float32()),
+            ("high", pa.float32()),
+            ("low", pa.float32()),
+            ("close", pa.float32()),
+            ("volume", pa.float64()),
+        ])
+        self.partitioning = ds.partitioning(pa.schema([
+            ("asset_type", pa.string()),
+            ("timeframe", pa.string()),
+            ("adjustment", pa.string()),
+            ("symbol", pa.string()),
+            ("year", pa.int16()),
+        ]), flavor="hive")
+        self.schema = pa.schema(list(self.bar_schema) + list(self.partitioning.schema))
+
+    def on_extract(self, endpoint: str, params: dict, paths: list):
+        """`FrdClient.extract_hooks` adapter: ingest the members of `data_file` archives."""
+        if endpoint == "data_file":
+            self.ingest(params["type"], paths, params.get("timeframe"), params.get("adjustment"))
+
+    def partition(self, asset_type: str, timeframe: str, adjustment: str, symbol: str, year: int) -> Path:
+        return (self.root / f"asset_type={asset_type}" / f"timeframe={timeframe}"
+                / f"adjustment={adjustment or NO_ADJUSTMENT}" / f"symbol={symbol}" / f"year={year}")
+
+    def _replace(self, directory: Path, frames: list):
+        """Merge `frames` into the partition file in `directory`; new rows win on equal timestamps."""
+        target = directory / PART
+        if target.exists():
+            frames = [pq.read_table(target, schema=self.bar_schema).to_pandas()] + frames
+        df = pd.concat(frames, ignore_index=True)
+        df = df.drop_duplicates("timestamp", keep="last").sort_values("timestamp", kind="stable")
+        directory.mkdir(parents=True, exist_ok=True)
+        # dot-prefixed, so dataset discovery skips it until the rename
+        tmp = directory / f".{uuid.uuid4().hex}.tmp"
+        pq.write_table(pa.Table.from_pandas(df, schema=self.bar_schema, preserve_index=False), tmp,
+                       row_group_size=self.batch_size)
+        os.replace(tmp, target)
+
+    def ingest(self, asset_type: str, paths, timeframe: str = None, adjustment: str = None) -> int:
+        """
+        Merge bar files into the dataset and return the number ingested.
+        `timeframe` defaults to the one in each file name; ingesting the
+        same file twice leaves the dataset unchanged.
+        """
+        written = 0
+        for path in map(Path, paths):
+            if not path.is_file() or path.stat().st_size == 0:
+                continue
+            symbol = symbol_from_name(path.name)
+            tf = timeframe or timeframe_from_name(path.name)
+            pending = {}
+            for df in read_bars(path, chunksize=self.batch_size):
+                if list(df.columns[:len(BAR_COLUMNS)]) != BAR_COLUMNS:
+                    log.warning("skipping %s: not a bar file", path)
+                    pending = {}
+                    break
+                df = df[BAR_COLUMNS]
+                years = df["timestamp"].dt.year
+                for year, rows in df.groupby(years, sort=True):
+                    pending.setdefault(int(year), []).append(rows)
+                # files are time-sorted, so years before this chunk's last are complete
+                for year in [y for y in pending if y < years.iloc[-1]]:
+                    self._replace(self.partition(asset_type, tf, adjustment, symbol, year), pending.pop(year))
+            else:
+                written += 1
+            for year, frames in pending.items():
+                self._replace(self.partition(asset_type, tf, adjustment, symbol, year), frames)
+        return written
+
+    def dataset(self):
+        """The whole store as a `pyarrow.dataset.Dataset`."""
+        return ds.dataset(self.root, schema=self.schema, format="parquet",
+                          partitioning=self.partitioning)
+
+    def read(self, asset_type: str = None, symbols=None, start=None, end=None,
+             columns=None, timeframe: str = None, adjustment: str = None) -> pd.DataFrame:
+        """
+        Load bars as a DataFrame, reading only `columns` (default: all) of
+        the partitions and row groups that can match the filters. `start`
+        is inclusive and `end` exclusive. Leave `timeframe`/`adjustment`
+        unset only if the store holds one of each (or select by the
+        `timeframe`/`adjustment` columns afterwards).
+        """
+        filters = []
+        if asset_type is not None:
+            filters.append(ds.field("asset_type") == asset_type)
+        if timeframe is not None:
+            filters.append(ds.field("timeframe") == timeframe)
+        if adjustment is not None:
+            filters.append(ds.field("adjustment") == adjustment)
+        if symbols is not None:
+            filters.append(ds.field("symbol").isin(list(symbols)))
+        if start is not None:
+            start = pd.Timestamp(start)
+            filters += [ds.field("year") >= start.year, ds.field("timestamp") >= start.to_pydatetime()]
+        if end is not None:
+            end = pd.Timestamp(end)
+            filters += [ds.field("year") <= end.year, ds.field("timestamp") < end.to_pydatetime()]
+        expr = functools.reduce(operator.and_, filters) if filters else None
+        if not self.root.exists():
+            return pd.DataFrame(columns=columns or self.schema.names)
+        return self.dataset().to_table(columns=columns, filter=expr).to_pandas()
@@ -10,12 +10,18 @@ setup(
     long_description=open("README.md").read(),
     long_description_content_type="text/markdown",
     url="https://github.com/yourusername/frd_client",
-    packages=find_packages(exclude=["tests*"]),
+    packages=find_packages(exclude=["tests*", "benchmarks*"]),
     install_requires=[
         "requests>=2.25.1",
-        "pandas",
+        # Timestamp.as_unit and non-nanosecond resolutions
+        "pandas>=2.0",
+        "numpy>=1.21",
     ],
-    python_requires='>=3.7',
+    extras_require={
+        "async": ["aiohttp>=3.8"],
+        "parquet": ["pyarrow>=8"],
+    },
+    python_requires='>=3.8',
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
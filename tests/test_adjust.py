@@ -0,0 +1,67 @@
+# tests/test_adjust.py
+"""
+test_adjust.py – local split/dividend adjustment from recorded corporate actions
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from frd_client.adjust import AdjustmentEngine, read_actions
+from frd_client.metadata import MetadataStore
+from frd_client.series import BarSeries
+
+@pytest.fixture
+def engine(tmp_path):
+    return AdjustmentEngine(MetadataStore(tmp_path / 'meta.db'))
+
+def bars():
+    ts = pd.to_datetime(['2024-01-02', '2024-01-03', '2024-01-04', '2024-01-05']).as_unit('ns').asi8
+    close = np.array([100, 102, 51, 50], dtype='float32')
+    return BarSeries(ts, close, close, close, close, np.array([10, 10, 20, 20], dtype='int64'))
+
+def test_split_and_dividend_factors(engine, tmp_path):
+    (tmp_path / 'AAPL_splits.txt').write_text('2024-01-04,2\n')
+    (tmp_path / 'AAPL_dividends.txt').write_text('date,value\n2024-01-05,0.5\n')
+    assert engine.load_file(tmp_path / 'AAPL_splits.txt') == {'AAPL'}
+    engine.load_file(tmp_path / 'AAPL_dividends.txt')
+    split = engine.adjust(bars(), 'AAPL', 'adj_split')
+    assert split.close.tolist() == [50, 51, 51, 50]
+    assert split.volume.tolist() == [20, 20, 20, 20]
+    both = engine.adjust(bars(), 'AAPL', 'adj_splitdiv')
+    div = 1 - 0.5 / 51
+    np.testing.assert_allclose(both.close, np.array([50, 51, 51, 50]) * [div, div, div, 1], rtol=1e-6)
+    raw = bars()
+    assert engine.adjust(raw, 'MSFT', 'adj_splitdiv') is raw
+    assert engine.adjust(bars(), 'AAPL', 'UNADJUSTED').close.tolist() == [100, 102, 51, 50]
+
+def test_frame_adjusts_per_symbol_and_updates_incrementally(engine, tmp_path):
+    raw = bars().to_frame()
+    df = pd.concat([raw.assign(symbol='AAPL'), raw.assign(symbol='MSFT')], ignore_index=True)
+    actions = tmp_path / 'actions.txt'
+    actions.write_text('symbol,date,type,value\nAAPL,2024-01-04,split,2\n')
+    engine.load_file(actions)
+    out = engine.adjust_frame(df, 'adj_split')
+    assert out['close'].tolist() == [50, 51, 51, 50, 100, 102, 51, 50]
+    assert df['close'].tolist()[:2] == [100, 102]            # input untouched
+    # re-sending known actions changes nothing; a new one only invalidates its symbol
+    assert engine.add_actions(read_actions(actions)) == set()
+    actions.write_text('MSFT,2024-01-04,splits,2\n')
+    assert engine.load_file(actions) == {'MSFT'}
+    assert engine.adjust_frame(df, 'adj_split')['close'].tolist()[4:6] == [50, 51]
+
+def test_dividend_reference_close_is_independent_of_the_slice(engine, tmp_path):
+    (tmp_path / 'AAPL_dividends.txt').write_text('2024-01-05,0.5\n')
+    engine.load_file(tmp_path / 'AAPL_dividends.txt')
+    full = engine.adjust(bars(), 'AAPL')
+    # the last bar before the ex-date is now on record, so a slice ending earlier agrees
+    np.testing.assert_array_equal(engine.adjust(bars()[:2], 'AAPL').close, full.close[:2])
+    assert engine.meta.get_actions(['AAPL'])[0][4] == 51
+
+def test_reference_close_recorded_from_unadjusted_downloads(engine, tmp_path):
+    (tmp_path / 'MSFT_dividends.txt').write_text('2024-01-05,0.5\n')
+    engine.load_file(tmp_path / 'MSFT_dividends.txt')
+    src = tmp_path / 'MSFT_1day.txt'
+    bars().to_frame().to_csv(src, header=False, index=False)
+    engine.on_extract('data_file', {'type': 'stock', 'adjustment': 'adj_split'}, [src])
+    assert engine.meta.get_actions(['MSFT'])[0][4] is None
+    engine.on_extract('data_file', {'type': 'stock', 'adjustment': 'UNADJUSTED'}, [src])
+    np.testing.assert_allclose(engine.adjust(bars()[:1], 'MSFT').close, [100 * (1 - 0.5 / 51)], rtol=1e-6)
@@ -0,0 +1,112 @@
+# tests/test_aio.py
+"""
+test_aio.py – runs the asyncio client and scheduler against a local stand-in HTTP server
+"""
+import asyncio, io, threading, zipfile
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import pytest
+
+pytest.importorskip("aiohttp")
+from frd_client.aio import AsyncFrdClient, AsyncUpdateScheduler, AsyncStockHandler
+from frd_client.metadata import MetadataStore
+
+def make_zip():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        z.writestr('test.csv', 'a,b\n1,2')
+    return buf.getvalue()
+
+class FakeApi(BaseHTTPRequestHandler):
+    seen = []
+    def log_message(self, *args): pass
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.seen.append((url.path, query, self.headers.get('Range')))
+        if url.path.endswith('/last_update'):
+            body, status = b'2025-05-22', 200
+        else:
+            body, status = make_zip(), 200
+            rng = self.headers.get('Range')
+            if rng:
+                body, status = body[int(rng[6:-1]):], 206
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def api():
+    FakeApi.seen = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeApi)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/api"
+    server.shutdown()
+
+def test_fetch_zip_resumes(tmp_path, api):
+    async def main():
+        async with AsyncFrdClient('id', tmp_path) as client:
+            client.BASE = api
+            part = client._partial_path('data_file', {'type': 'stock'})
+            part.parent.mkdir(parents=True)
+            part.write_bytes(make_zip()[:10])
+            await client.fetch_zip('data_file', {'type': 'stock'}, tmp_path / 'out')
+    asyncio.run(main())
+    assert (tmp_path / 'out' / 'test.csv').read_text() == 'a,b\n1,2'
+    assert FakeApi.seen[-1][2] == 'bytes=10-'
+
+def test_handler_download_full(tmp_path, api):
+    meta = MetadataStore(tmp_path / 'meta.db')
+    async def main():
+        async with AsyncFrdClient('id', tmp_path) as client:
+            client.BASE = api
+            await AsyncStockHandler(client, meta).download_full('A', '1day', 'adj')
+    asyncio.run(main())
+    assert (tmp_path / 'stock' / 'full' / 'A' / 'test.csv').exists()
+    assert meta.get('stock', 'full_A') == '2025-05-22'
+
+def test_scheduler_run_daily(tmp_path, api):
+    meta = MetadataStore(tmp_path / 'meta.db')
+    meta.set_update('fx', 'day', date(2025, 5, 22))
+    async def main():
+        async with AsyncFrdClient('id', tmp_path) as client:
+            client.BASE = api
+            return await AsyncUpdateScheduler(client, meta, max_downloads=2).run_daily()
+    results = {r.asset_type: r.status for r in asyncio.run(main())}
+    assert results.pop('fx') == 'skipped'
+    assert set(results.values()) == {'ran'}
+    probes = [s for s in FakeApi.seen if s[0].endswith('/last_update')]
+    assert len(probes) == 6
+    assert meta.get('crypto', 'day') == '2025-05-22'
+
+def test_iter_batches_is_async(tmp_path, api):
+    async def main():
+        async with AsyncFrdClient('id', tmp_path) as client:
+            client.BASE = api
+            return [(name, len(df)) async for name, df in client.iter_batches('data_file', {'type': 'stock'})]
+    assert asyncio.run(main()) == [('test.csv', 1)]
+    assert not any(p.is_file() for p in tmp_path.rglob('*'))
+
+def test_scheduler_leases_off_the_event_loop(tmp_path, api, monkeypatch):
+    from frd_client.leases import JobQueue
+    meta = MetadataStore(tmp_path / 'meta.db')
+    meta.acquire_lease('stock/day', 'other-host', ttl=60)
+    threads = set()
+    for name in ('acquire_lease', 'set_update'):
+        original = getattr(MetadataStore, name)
+        def spy(self, *args, _original=original, **kwargs):
+            threads.add(threading.current_thread())
+            return _original(self, *args, **kwargs)
+        monkeypatch.setattr(MetadataStore, name, spy)
+    async def main():
+        async with AsyncFrdClient('id', tmp_path) as client:
+            client.BASE = api
+            sched = AsyncUpdateScheduler(client, meta, leases=JobQueue(meta, owner='me'))
+            return await sched.run_daily()
+    results = {r.asset_type: r.status for r in asyncio.run(main())}
+    assert results.pop('stock') == 'leased'
+    assert set(results.values()) == {'ran'}
+    assert threads and threading.main_thread() not in threads
+    assert meta.get_lease('fx/day') is None
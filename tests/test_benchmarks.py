@@ -0,0 +1,31 @@
+# tests/test_benchmarks.py
+"""
+test_benchmarks.py – smoke-runs the benchmark stages against the fake server
+"""
+from frd_client.client import FrdClient
+from frd_client.metadata import MetadataStore
+from frd_client.metrics import Metrics
+from benchmarks.fake_server import FakeFrdServer, symbol_names
+from benchmarks.run import run
+
+def test_fake_server_serves_conditional_archives(tmp_path):
+    metrics = Metrics()
+    with FakeFrdServer(symbols=3, rows=5) as server:
+        client = FrdClient('id', tmp_path, meta=MetadataStore(tmp_path / 'meta.db'), metrics=metrics)
+        client.BASE = server.url
+        assert client._get('last_update', {'type': 'stock'}) == b'2025-05-22'
+        paths = client.fetch_zip('meta_file', {'type': 'etf'}, tmp_path / 'meta')
+        assert sorted(p.name for p in paths) == [f'{n}_meta.txt' for n in symbol_names(3)]
+        # the stored ETag goes back as If-None-Match and the server answers 304
+        assert client.fetch_zip('meta_file', {'type': 'etf'}, tmp_path / 'meta') == []
+    counters = {c['name']: c['value'] for c in metrics.snapshot()['counters']}
+    assert counters['not_modified'] == 1
+
+def test_run_reports_every_stage(tmp_path):
+    results = run(tmp_path, symbols=2, rows=10, max_workers=2)
+    stages = {r['stage']: r for r in results}
+    assert stages['extract']['items'] == 2 and stages['extract']['rows'] == 20
+    assert stages['fetch_zip_unchanged']['items'] == 0
+    assert stages['scheduler_run_daily']['items'] == 6
+    assert stages['load_dataframe']['items'] == 2
+    assert all(r['wall_s'] >= 0 and r['peak_rss_mb'] > 0 for r in results)
@@ -0,0 +1,31 @@
+# tests/test_cache.py
+"""
+test_cache.py – LRU eviction, version stamps and the on-disk tier of ResultCache
+"""
+import pandas as pd
+from frd_client.cache import ResultCache, cache_key, frame_bytes
+
+def frame(n):
+    return pd.DataFrame({'x': range(n)})
+
+def test_lru_evicts_by_bytes():
+    size = frame_bytes(frame(100))
+    cache = ResultCache(max_bytes=2 * size)
+    for name in ('a', 'b'):
+        cache.put(name, 1, frame(100))
+    assert cache.get('a', 1) is not None        # 'b' is now least recently used
+    cache.put('c', 1, frame(100))
+    assert cache.get('b', 1) is None
+    assert cache.get('a', 1) is not None and cache.get('c', 1) is not None
+    assert cache.bytes == 2 * size
+
+def test_version_change_drops_only_that_entry(tmp_path):
+    cache = ResultCache(disk_dir=tmp_path)
+    day = cache_key('stock', 'day', '1min', adjustment='adj', ticker_list=['MSFT', 'AAPL'])
+    week = cache_key('stock', 'week', '1min', adjustment='adj')
+    cache.put(day, '2024-01-02', frame(3))
+    cache.put(week, '2023-12-29', frame(5))
+    assert cache.get(day, '2024-01-03') is None
+    assert len(cache) == 1 and len(list(tmp_path.glob('*.pkl'))) == 1
+    # a fresh process picks the surviving entry up from disk
+    assert ResultCache(disk_dir=tmp_path).get(week, '2023-12-29')['x'].tolist() == list(range(5))
@@ -4,30 +4,212 @@ test_client.py – mocks HTTP to test ZIP fetch/unpack
 """
 import io, zipfile
 import pytest
+import requests
 from pathlib import Path
 from frd_client.client import FrdClient
+from frd_client.metadata import MetadataStore
 
 class DummyResponse:
     def __init__(self, content, status_code=200):
         self.content = content
         self.status_code = status_code
+        self.headers = {}
+    def close(self): pass
     def raise_for_status(self):
-        if self.status_code != 200:
+        if self.status_code >= 400:
             raise Exception("HTTP error")
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+    def __enter__(self): return self
+    def __exit__(self, *exc): pass
+
+def make_zip():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        z.writestr('test.csv', 'a,b\n1,2')
+    return buf.getvalue()
 
 @pytest.fixture(autouse=True)
 def patch_requests(monkeypatch):
-    def fake_get(url, params, timeout):
-        # Return a zip with one file
-        buf = io.BytesIO()
-        with zipfile.ZipFile(buf, 'w') as z:
-            z.writestr('test.csv', 'a,b\n1,2')
-        return DummyResponse(buf.getvalue())
-    monkeypatch.setattr('frd_client.client.requests.get', fake_get)
+    calls = []
+    def fake_get(self, url, params, timeout, headers=None, stream=False):
+        # Return a zip with one file, honouring Range requests
+        calls.append(headers or {})
+        raw = make_zip()
+        rng = (headers or {}).get('Range')
+        if rng:
+            return DummyResponse(raw[int(rng[6:-1]):], 206)
+        return DummyResponse(raw)
+    monkeypatch.setattr(requests.Session, 'get', fake_get)
+    return calls
 
 def test_fetch_zip(tmp_path):
     client = FrdClient('id', tmp_path)
     dest = tmp_path / 'out'
     client.fetch_zip('endpoint', {'foo':'bar'}, dest)
     files = list(dest.rglob('test.csv'))
-    assert len(files) == 1
\ No newline at end of file
+    assert len(files) == 1
+    assert not list((tmp_path / '.partial').iterdir())
+
+def test_supplied_session_keeps_its_adapters(tmp_path):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(max_retries=5)
+    session.mount('https://', adapter)
+    client = FrdClient('id', tmp_path, session=session)
+    assert client.session.get_adapter('https://firstratedata.com') is adapter
+
+def test_fetch_zip_in_memory(tmp_path):
+    client = FrdClient('id', tmp_path, stream=False)
+    dest = tmp_path / 'out'
+    client.fetch_zip('endpoint', {'foo':'bar'}, dest)
+    assert (dest / 'test.csv').exists()
+
+def test_fetch_zip_resumes_partial(tmp_path, patch_requests):
+    client = FrdClient('id', tmp_path)
+    part = client._partial_path('endpoint', {'foo':'bar'})
+    part.parent.mkdir(parents=True)
+    part.write_bytes(make_zip()[:10])
+    dest = tmp_path / 'out'
+    client.fetch_zip('endpoint', {'foo':'bar'}, dest)
+    assert patch_requests[-1] == {'Range': 'bytes=10-'}
+    assert (dest / 'test.csv').read_text() == 'a,b\n1,2'
+
+def test_dropped_connection_keeps_partial(tmp_path, monkeypatch):
+    class Dropping(DummyResponse):
+        def iter_content(self, chunk_size):
+            yield self.content[:10]
+            raise requests.ConnectionError("reset")
+    monkeypatch.setattr(requests.Session, 'get',
+                        lambda self, url, params, timeout, headers=None, stream=False: Dropping(make_zip()))
+    client = FrdClient('id', tmp_path, retries=0)
+    with pytest.raises(requests.ConnectionError):
+        client.fetch_zip('endpoint', {'foo':'bar'}, tmp_path / 'out')
+    assert client._partial_path('endpoint', {'foo':'bar'}).stat().st_size == 10
+
+def test_get_retries_transient_status(tmp_path, monkeypatch):
+    responses = [DummyResponse(b'', 503), DummyResponse(b'', 429), DummyResponse(b'2025-05-22')]
+    monkeypatch.setattr(requests.Session, 'get', lambda self, url, params, timeout: responses.pop(0))
+    client = FrdClient('id', tmp_path, backoff=0)
+    assert client._get('last_update', {}) == b'2025-05-22'
+    assert responses == []
+
+def test_get_gives_up_after_retries(tmp_path, monkeypatch):
+    monkeypatch.setattr(requests.Session, 'get', lambda self, url, params, timeout: DummyResponse(b'', 500))
+    client = FrdClient('id', tmp_path, retries=2, backoff=0)
+    with pytest.raises(Exception, match="HTTP error"):
+        client._get('last_update', {})
+
+def test_fetch_zip_resumes_after_drop(tmp_path, monkeypatch):
+    seen = []
+    class Dropping(DummyResponse):
+        def iter_content(self, chunk_size):
+            yield self.content[:10]
+            raise requests.ConnectionError("reset")
+    def fake_get(self, url, params, timeout, headers=None, stream=False):
+        seen.append(headers)
+        raw = make_zip()
+        if headers:
+            return DummyResponse(raw[10:], 206)
+        return Dropping(raw)
+    monkeypatch.setattr(requests.Session, 'get', fake_get)
+    client = FrdClient('id', tmp_path, backoff=0)
+    client.fetch_zip('endpoint', {'foo':'bar'}, tmp_path / 'out')
+    assert seen == [{}, {'Range': 'bytes=10-'}]
+    assert (tmp_path / 'out' / 'test.csv').exists()
+
+def test_iter_batches_parses_members_without_extracting(tmp_path, monkeypatch):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        z.writestr('AAPL_1min.txt', ''.join(f'2024-01-02 09:3{i}:00,1.5,2,1,1.75,{i}\n' for i in range(5)))
+        z.writestr('MSFT_1min.txt', '2024-01-02 09:30:00,3,4,2,3.5,7\n')
+    raw = buf.getvalue()
+    monkeypatch.setattr(requests.Session, 'get',
+                        lambda self, url, params, timeout, headers=None, stream=False: DummyResponse(raw))
+    client = FrdClient('id', tmp_path)
+    batches = list(client.iter_batches('data_file', {'type': 'stock'}, batch_size=2))
+    assert [(name, len(df)) for name, df in batches] == [
+        ('AAPL_1min.txt', 2), ('AAPL_1min.txt', 2), ('AAPL_1min.txt', 1), ('MSFT_1min.txt', 1)]
+    df = batches[-1][1]
+    assert list(df.columns) == ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    assert str(df['close'].dtype) == 'float32'
+    assert str(df['timestamp'].dtype).startswith('datetime64')
+    assert not any(p.is_file() for p in tmp_path.rglob('*'))
+
+def test_iter_batches_extracts_to_dest_like_fetch_zip(tmp_path, monkeypatch):
+    raw = zip_of({'../AAPL_1min.txt': '2024-01-02 09:30:00,1.5,2,1,1.75,3\n'})
+    monkeypatch.setattr(requests.Session, 'get',
+                        lambda self, url, params, timeout, headers=None, stream=False: DummyResponse(raw))
+    seen = []
+    client = FrdClient('id', tmp_path / 'work', meta=MetadataStore(tmp_path / 'meta.db'))
+    client.extract_hooks.append(lambda endpoint, params, paths: seen.append(paths))
+    dest = tmp_path / 'out'
+    batches = list(client.iter_batches('data_file', {'type': 'stock'}, dest=dest))
+    assert [(name, len(df)) for name, df in batches] == [('../AAPL_1min.txt', 1)]
+    assert seen == [[dest / 'AAPL_1min.txt']]
+    assert not (tmp_path / 'AAPL_1min.txt').exists()
+    assert list((tmp_path / 'work' / '.staging').iterdir()) == []
+
+def test_fetch_zip_runs_extract_hooks(tmp_path):
+    seen = []
+    client = FrdClient('id', tmp_path)
+    client.extract_hooks.append(lambda endpoint, params, paths: seen.append((endpoint, paths)))
+    paths = client.fetch_zip('data_file', {'type': 'stock'}, tmp_path / 'out')
+    assert paths == [tmp_path / 'out' / 'test.csv']
+    assert seen == [('data_file', paths)]
+
+def zip_of(members):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, 'w') as z:
+        for name, text in members.items():
+            z.writestr(name, text)
+    return buf.getvalue()
+
+def test_conditional_request_skips_unchanged_archive(tmp_path, monkeypatch):
+    sent = []
+    def fake_get(self, url, params, timeout, headers=None, stream=False):
+        sent.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == '"v1"':
+            return DummyResponse(b'', 304)
+        r = DummyResponse(make_zip())
+        r.headers = {'ETag': '"v1"', 'Last-Modified': 'Thu, 22 May 2025 00:00:00 GMT'}
+        return r
+    monkeypatch.setattr(requests.Session, 'get', fake_get)
+    meta = MetadataStore(tmp_path / 'meta.db')
+    client = FrdClient('id', tmp_path / 'work', meta=meta)
+    assert len(client.fetch_zip('meta_file', {'type': 'etf'}, tmp_path / 'out')) == 1
+    hooked = []
+    client.extract_hooks.append(lambda *a: hooked.append(a))
+    assert client.fetch_zip('meta_file', {'type': 'etf'}, tmp_path / 'out') == []
+    assert sent[-1] == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Thu, 22 May 2025 00:00:00 GMT'}
+    assert hooked == []
+    assert not list((tmp_path / 'work' / '.partial').iterdir())
+    # extracted files deleted since: fetch unconditionally and restore them
+    (tmp_path / 'out' / 'test.csv').unlink()
+    assert client.fetch_zip('meta_file', {'type': 'etf'}, tmp_path / 'out') == [tmp_path / 'out' / 'test.csv']
+    assert sent[-1] == {}
+    assert (tmp_path / 'out' / 'test.csv').exists()
+
+def test_only_changed_members_are_written(tmp_path, monkeypatch):
+    archives = [zip_of({'A.txt': 'old', 'B.txt': 'same'}), zip_of({'A.txt': 'new', 'B.txt': 'same'})]
+    monkeypatch.setattr(requests.Session, 'get',
+                        lambda self, url, params, timeout, headers=None, stream=False: DummyResponse(archives.pop(0)))
+    client = FrdClient('id', tmp_path / 'work', meta=MetadataStore(tmp_path / 'meta.db'))
+    dest = tmp_path / 'out'
+    assert sorted(p.name for p in client.fetch_zip('data_file', {}, dest)) == ['A.txt', 'B.txt']
+    assert client.fetch_zip('data_file', {}, dest) == [dest / 'A.txt']
+    assert (dest / 'A.txt').read_text() == 'new'
+
+def test_unpack_keeps_hostile_members_inside_dest(tmp_path, monkeypatch):
+    archives = [zip_of({'../../escaped.txt': 'x', '/abs.txt': 'y'}), zip_of({'link/evil.txt': 'z'})]
+    monkeypatch.setattr(requests.Session, 'get',
+                        lambda self, url, params, timeout, headers=None, stream=False: DummyResponse(archives.pop(0)))
+    client = FrdClient('id', tmp_path / 'work', meta=MetadataStore(tmp_path / 'meta.db'))
+    dest = tmp_path / 'a' / 'b' / 'out'
+    assert sorted(client.fetch_zip('data_file', {}, dest)) == [dest / 'abs.txt', dest / 'escaped.txt']
+    assert not (tmp_path / 'a' / 'escaped.txt').exists()
+    (tmp_path / 'outside').mkdir()
+    (dest / 'link').symlink_to(tmp_path / 'outside')
+    with pytest.raises(zipfile.BadZipFile):
+        client.fetch_zip('data_file', {}, dest)
+    assert not list((tmp_path / 'outside').iterdir())
@@ -0,0 +1,88 @@
+# tests/test_continuous.py
+"""
+test_continuous.py – roll tables, stitching and back adjustment of futures contracts
+"""
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from frd_client.continuous import ContinuousBuilder, load_contracts, parse_contract, roll_table
+from frd_client.metadata import MetadataStore
+from frd_client.series import BarSeries
+
+def daily(start, closes, volumes):
+    ts = pd.date_range(start, periods=len(closes), freq='D').as_unit('ns').asi8
+    c = np.array(closes, dtype='float32')
+    return BarSeries(ts, c, c, c, c, np.array(volumes, dtype='int64'))
+
+@pytest.fixture
+def contracts():
+    # ESH24 leads until ESM24 out-trades it on Jan 3; ESH24 stops after Jan 4
+    return {
+        'ESM24': daily('2024-01-01', [110, 111, 112, 113, 114], [1, 5, 50, 60, 70]),
+        'ESH24': daily('2024-01-01', [100, 101, 102, 103], [50, 40, 30, 20]),
+    }
+
+def test_parse_contract():
+    assert parse_contract('ESH24') == ('ES', 2024, 3)
+    assert parse_contract('6EZ23') == ('6E', 2023, 12)
+    assert parse_contract('SPY') is None
+
+def test_volume_roll_and_back_adjustment(contracts):
+    rolls = ContinuousBuilder().rolls('ES', contracts)
+    assert rolls == [('2024-01-01', 'ESH24'), ('2024-01-04', 'ESM24')]
+    raw, _ = ContinuousBuilder().build('ES', contracts, adjust=None)
+    assert raw.close.tolist() == [100, 101, 102, 113, 114]
+    diff, _ = ContinuousBuilder().build('ES', contracts, adjust='difference')
+    assert diff.close.tolist() == [110, 111, 112, 113, 114]
+    ratio, _ = ContinuousBuilder().build('ES', contracts, adjust='ratio')
+    np.testing.assert_allclose(ratio.close, [100 * 112 / 102, 101 * 112 / 102, 112, 113, 114], rtol=1e-6)
+
+def test_calendar_rule():
+    contracts = {'CLF24': daily('2024-01-01', [1] * 10, [1] * 10),
+                 'CLG24': daily('2024-01-01', [2] * 20, [1] * 20)}
+    assert roll_table(contracts, 'calendar', days_before=3)[1][1] == 'CLG24'
+    assert [pd.Timestamp(d).day for d, _ in roll_table(contracts, 'calendar', days_before=3)] == [1, 7]
+
+def test_roll_table_is_cached_and_extended(tmp_path, contracts):
+    meta = MetadataStore(tmp_path / 'meta.db')
+    builder = ContinuousBuilder(meta)
+    builder.rolls('ES', contracts)
+    contracts['ESU24'] = daily('2024-01-03', [120, 121, 122, 123], [0, 0, 80, 90])
+    contracts['ESM24'] = daily('2024-01-01', [110, 111, 112, 113, 114, 115, 116], [1, 5, 50, 60, 70, 10, 5])
+    assert builder.rolls('ES', contracts) == [('2024-01-01', 'ESH24'), ('2024-01-04', 'ESM24'),
+                                              ('2024-01-06', 'ESU24')]
+    assert meta.get_rolls('ES', 'volume')[-1] == ('2024-01-06', 'ESU24')
+
+def test_load_contracts(tmp_path):
+    (tmp_path / 'ESH24_1day.txt').write_text('2024-01-02,1,2,0.5,1.5,10\n')
+    (tmp_path / 'ES_contracts.txt').write_text('ESH24,2024-03-15\n')
+    roots = load_contracts(tmp_path)
+    assert list(roots) == ['ES'] and list(roots['ES']) == ['ESH24']
+
+def bar_file(path, start, closes, volumes, mtime):
+    days = pd.date_range(start, periods=len(closes), freq='D')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(''.join(f'{d:%Y-%m-%d},{c},{c},{c},{c},{v}\n' for d, c, v in zip(days, closes, volumes)))
+    os.utime(path, (mtime, mtime))
+
+def test_day_update_keeps_full_history(tmp_path):
+    futures = tmp_path / 'futures'
+    bar_file(futures / 'full' / 'ESH24_1day.txt', '2024-01-01', [100, 101, 102, 103], [50, 40, 30, 20], 1000)
+    bar_file(futures / 'full' / 'ESM24_1day.txt', '2024-01-01', [110, 111, 112, 113], [1, 5, 50, 60], 1000)
+    builder = ContinuousBuilder(MetadataStore(tmp_path / 'meta.db'))
+    builder.build_all(futures)
+    # the day update restates Jan 4 and adds Jan 5
+    bar_file(futures / 'day' / 'ESM24_1day.txt', '2024-01-04', [113.5, 114], [65, 70], 2000)
+    contracts = load_contracts(futures)
+    assert contracts['ES']['ESM24'].close.tolist() == [110, 111, 112, 113.5, 114]
+    series, rolls = builder.build_all(futures, adjust=None)['ES']
+    assert rolls == [('2024-01-01', 'ESH24'), ('2024-01-04', 'ESM24')]
+    assert series.close.tolist() == [100, 101, 102, 113.5, 114]
+    assert rolls == ContinuousBuilder().rolls('ES', contracts['ES'])
+
+def test_rule_key_depends_on_expiries():
+    keys = {ContinuousBuilder(rule='calendar', expiries=e).rule_key
+            for e in (None, {'ESH24': '2024-03-15'}, {'ESH24': '2024-03-14'})}
+    assert len(keys) == 3
+    assert ContinuousBuilder(rule='calendar').rule_key == 'calendar:5'
@@ -4,19 +4,24 @@ test_handlers.py – checks `needs_update`, `download_full/update` calls for `St
 """
 import pytest
 from datetime import date
-from frd_client.instruments.base import InstrumentHandler
+from pathlib import Path
+from frd_client.instruments.base import InstrumentHandler, RemoteDateCache
 from frd_client.instruments.stock import StockHandler
 
 class DummyClient:
-    def __init__(self): self.called = []
-    def fetch_zip(self, endpoint, params, dest): self.called.append((endpoint, params))
-    def _get(self, endpoint, params): return b'2025-05-22'
+    def __init__(self):
+        self.called = []
+        self.work_dir = Path('data')
+    def fetch_zip(self, endpoint, params, dest, lease=None): self.called.append((endpoint, params))
+    def _get(self, endpoint, params):
+        self.called.append((endpoint, params))
+        return b'2025-05-22'
 
 class DummyMeta:
     def __init__(self): self.store = {}
     def get(self, asset_type, period): return self.store.get((asset_type, period))
     def set_update(self, asset_type, period, d): self.store[(asset_type, period)] = d.isoformat()
-    def set_full(self, asset_type, key, d): self.store[(asset_type, key)] = d.isoformat()
+    def set_full(self, asset_type, key, d): self.store[(asset_type, f'full_{key}')] = d.isoformat()
 
 @pytest.fixture
 def stock_handler():
@@ -34,3 +39,19 @@ def test_download_update_calls_fetch_and_meta(stock_handler):
     stock_handler.download_update('day', '1day', 'adj')
     assert stock_handler.client.called[0][0] == 'data_file'
     assert ('stock', 'day') in stock_handler.meta.store
+
+def test_last_remote_update_probed_once(stock_handler):
+    assert stock_handler.needs_update('day')
+    stock_handler.download_update('day', '1day', 'adj')
+    probes = [c for c in stock_handler.client.called if c[0] == 'last_update']
+    assert len(probes) == 1
+
+def test_remote_cache_shared_and_expires():
+    cache = RemoteDateCache(ttl=0)
+    handler = StockHandler(DummyClient(), DummyMeta(), cache)
+    handler.last_remote_update()
+    handler.last_remote_update()
+    assert len(handler.client.called) == 2
+    cache.ttl = 60
+    handler.last_remote_update()
+    assert cache.get(('stock', False)) == date(2025, 5, 22)
@@ -0,0 +1,38 @@
+# tests/test_harvest.py
+"""
+test_harvest.py – shards a full harvest and resumes only the missing shards
+"""
+from pathlib import Path
+from frd_client.harvest import FullHarvest, symbol_shards, letter_shards
+from frd_client.instruments.etf import EtfHandler
+from frd_client.metadata import MetadataStore
+
+class DummyClient:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.fetched = []
+        self.work_dir = Path('data')
+    def fetch_zip(self, endpoint, params, dest, lease=None):
+        if params.get('ticker') in self.fail:
+            raise RuntimeError("dropped")
+        self.fetched.append((endpoint, params.get('ticker')))
+    def _get(self, endpoint, params): return b'2025-05-22'
+
+def test_shard_helpers():
+    assert symbol_shards(['AAPL', 'MSFT', 'SPY'], 2) == ['AAPL,MSFT', 'SPY']
+    assert letter_shards(10) == ['A-J', 'K-T', 'U-Z']
+
+def test_run_checkpoints_and_resumes(tmp_path):
+    meta = MetadataStore(tmp_path / 'meta.db')
+    shards = symbol_shards(['AAPL', 'MSFT', 'QQQ', 'SPY'], 1)
+    client = DummyClient(fail={'QQQ'})
+    first = FullHarvest(EtfHandler(client, meta), max_workers=3).run(shards, timeframe='1day', adjustment='adj')
+    assert [r.status for r in first] == ['ran', 'ran', 'failed', 'ran']
+    assert meta.get('etf', 'full_SPY') == '2025-05-22'
+
+    client = DummyClient()
+    harvest = FullHarvest(EtfHandler(client, meta), max_workers=3)
+    assert harvest.pending(shards) == ['QQQ']
+    second = harvest.run(shards, timeframe='1day', adjustment='adj')
+    assert [r.status for r in second] == ['skipped', 'skipped', 'ran', 'skipped']
+    assert client.fetched == [('data_file', 'QQQ'), ('meta_file', 'QQQ')]
@@ -4,6 +4,7 @@ test_index.py – exercises `load_dataframe` against real CSV files
 """
 import pytest
 import pandas as pd
+from datetime import date
 from pathlib import Path
 from frd_client.index import load_dataframe
 from frd_client.client import FrdClient
@@ -17,9 +18,9 @@ def setup_data(tmp_path, monkeypatch):
     base.mkdir(parents=True)
     df = pd.DataFrame({'x':[1,2]})
     df.to_csv(base / 'a.csv', index=False)
-    # stub scheduler and handler
-    monkeypatch.setattr(UpdateScheduler, '__init__', lambda s,c,m: None)
-    monkeypatch.setattr(UpdateScheduler, 'handlers', {'crypto': type('H',(),{ 'needs_update':lambda s,p: False})()})
+    # stub handler
+    handler = type('H',(),{ 'needs_update':lambda s,p: False})()
+    monkeypatch.setattr(UpdateScheduler, 'HANDLERS', {'crypto': lambda client, meta, remote_cache: handler})
     client = FrdClient('id', tmp_path)
     meta = MetadataStore(tmp_path / 'meta.db')
     return client, meta
@@ -29,3 +30,90 @@ def test_load_dataframe(setup_data):
     df = load_dataframe(client, meta, 'crypto', 'day', '1day')
     assert isinstance(df, pd.DataFrame)
     assert df['x'].tolist() == [1,2]
+
+def test_load_dataframe_parallel_with_filters(setup_data):
+    client, meta = setup_data
+    base = client.work_dir / 'crypto' / 'day'
+    (base / 'a.csv').unlink()
+    for sym in ('BTC', 'ETH', 'SOL'):
+        (base / f'{sym}_1min.txt').write_text(
+            '2024-01-01 00:00:00,1,2,0.5,1.5,10\n2024-01-02 00:00:00,1,2,0.5,1.5,10\n')
+    df = load_dataframe(client, meta, 'crypto', 'day', '1min', symbols=['BTC', 'SOL'],
+                        start='2024-01-02', max_workers=2)
+    assert df['symbol'].tolist() == ['BTC', 'SOL']
+    assert str(df['symbol'].dtype) == 'category'
+    assert str(df['close'].dtype) == 'float32'
+
+def test_time_filter_applies_without_timestamp_column(setup_data):
+    client, meta = setup_data
+    base = client.work_dir / 'crypto' / 'day'
+    (base / 'a.csv').unlink()
+    (base / 'BTC_1min.txt').write_text(
+        '2024-01-01 00:00:00,1,2,0.5,1.5,10\n2024-01-02 00:00:00,1,2,0.5,2.5,10\n')
+    df = load_dataframe(client, meta, 'crypto', 'day', '1min', start='2024-01-02', columns=['close'])
+    assert 'timestamp' not in df
+    assert df['close'].tolist() == [2.5]
+
+def test_empty_files_are_skipped(setup_data):
+    client, meta = setup_data
+    base = client.work_dir / 'crypto' / 'day'
+    (base / 'a.csv').unlink()
+    (base / 'BTC_1min.txt').write_text('2024-01-01 00:00:00,1,2,0.5,1.5,10\n')
+    (base / 'ETH_1min.txt').write_text('')
+    df = load_dataframe(client, meta, 'crypto', 'day', '1min')
+    assert df['symbol'].tolist() == ['BTC']
+
+def test_cache_hits_reuse_remote_dates(tmp_path, monkeypatch):
+    from frd_client.cache import ResultCache
+    from frd_client.instruments.base import RemoteDateCache
+    base = tmp_path / 'crypto' / 'day'
+    base.mkdir(parents=True)
+    (base / 'BTC_1day.txt').write_text('2024-01-01,1,2,0.5,1.5,10\n')
+    client, meta = FrdClient('id', tmp_path), MetadataStore(tmp_path / 'meta.db')
+    meta.set_update('crypto', 'day', date(2024, 1, 5))
+    probes = []
+    monkeypatch.setattr(FrdClient, '_get', lambda self, e, p: probes.append(e) or b'2024-01-05')
+    cache, remote = ResultCache(), RemoteDateCache()
+    for _ in range(3):
+        df = load_dataframe(client, meta, 'crypto', 'day', '1day', cache=cache, remote_cache=remote)
+    assert probes == ['last_update'] and len(df) == 1
+
+def test_load_dataframe_no_files(setup_data):
+    client, meta = setup_data
+    with pytest.raises(FileNotFoundError):
+        load_dataframe(client, meta, 'crypto', 'day', '1day', symbols=['NOPE'])
+
+def test_load_dataframe_prunes_by_manifest(setup_data, monkeypatch):
+    client, meta = setup_data
+    base = client.work_dir / 'crypto' / 'day'
+    (base / 'a.csv').unlink()
+    old = base / 'BTC_1min.txt'
+    old.write_text('2023-01-01 00:00:00,1,2,0.5,1.5,10\n')
+    new = base / 'ETH_1min.txt'
+    new.write_text('2024-01-02 00:00:00,1,2,0.5,1.5,10\n')
+    meta.record_files('crypto', [old, new], '1min')
+    opened = []
+    import frd_client.index as index
+    real = index.read_bars
+    monkeypatch.setattr(index, 'read_bars', lambda p, **kw: opened.append(p.name) or real(p, **kw))
+    # recorded files are found through the manifest, without walking the tree
+    monkeypatch.setattr(index, '_walk', lambda *a: pytest.fail('walked the tree'))
+    df = load_dataframe(client, meta, 'crypto', 'day', '1min', start='2024-01-01', max_workers=1)
+    assert opened == ['ETH_1min.txt']
+    assert df['symbol'].tolist() == ['ETH']
+    assert load_dataframe(client, meta, 'crypto', 'day', '1min', start='2025-01-01').empty
+
+def test_load_dataframe_cached_until_set_update(setup_data, monkeypatch):
+    from datetime import date
+    from frd_client.cache import ResultCache
+    import frd_client.index as index
+    client, meta = setup_data
+    cache = ResultCache()
+    first = load_dataframe(client, meta, 'crypto', 'day', '1day', cache=cache)
+    monkeypatch.setattr(index, '_load', lambda *a: pytest.fail('cache miss'))
+    assert load_dataframe(client, meta, 'crypto', 'day', '1day', cache=cache).equals(first)
+    meta.set_update('crypto', 'week', date(2024, 1, 5))
+    assert load_dataframe(client, meta, 'crypto', 'day', '1day', cache=cache).equals(first)
+    meta.set_update('crypto', 'day', date(2024, 1, 5))
+    with pytest.raises(pytest.fail.Exception):
+        load_dataframe(client, meta, 'crypto', 'day', '1day', cache=cache)
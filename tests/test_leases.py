@@ -0,0 +1,68 @@
+# tests/test_leases.py
+"""
+test_leases.py – job leases shared through MetadataStore and leased scheduler runs
+"""
+import time
+from frd_client.client import FrdClient
+from frd_client.leases import JobQueue
+from frd_client.metadata import MetadataStore
+from frd_client.scheduler import UpdateScheduler
+from benchmarks.fake_server import FakeFrdServer
+
+def test_lease_exclusion_and_expiry(tmp_path):
+    meta = MetadataStore(tmp_path / 'meta.db')
+    assert meta.acquire_lease('stock/day', 'a', ttl=10, now=100)
+    assert not meta.acquire_lease('stock/day', 'b', ttl=10, now=105)
+    assert meta.acquire_lease('stock/day', 'a', ttl=10, now=105)     # re-entrant for its owner
+    assert meta.acquire_lease('stock/day', 'b', ttl=10, now=116)     # expired: taken over
+    assert not meta.renew_lease('stock/day', 'a', ttl=10)
+    meta.release_lease('stock/day', 'a')                              # not a's to release
+    assert meta.get_lease('stock/day')[0] == 'b'
+
+def test_heartbeat_keeps_lease_and_release_frees_it(tmp_path):
+    meta = MetadataStore(tmp_path / 'meta.db')
+    queue = JobQueue(meta, owner='me', ttl=0.3)
+    with queue.lease('fx/day') as held:
+        time.sleep(0.5)
+        assert not held.lost.is_set()
+        assert not MetadataStore(tmp_path / 'meta.db').acquire_lease('fx/day', 'other', ttl=1)
+    assert meta.get_lease('fx/day') is None
+    assert queue.run(['fx/day', 'fx/week'], lambda job: job.upper()) == {'fx/day': 'FX/DAY', 'fx/week': 'FX/WEEK'}
+
+def test_scheduler_skips_jobs_leased_elsewhere(tmp_path):
+    meta = MetadataStore(tmp_path / 'meta.db')
+    meta.acquire_lease('stock/day', 'other-host', ttl=60)
+    with FakeFrdServer(symbols=2, rows=5) as server:
+        client = FrdClient('id', tmp_path, meta=meta)
+        client.BASE = server.url
+        results = {r.asset_type: r.status for r in
+                   UpdateScheduler(client, meta, leases=JobQueue(meta, owner='me')).run_daily()}
+    assert results.pop('stock') == 'leased'
+    assert set(results.values()) == {'ran'}
+    assert meta.get('stock', 'day') is None
+    assert not (tmp_path / 'stock' / 'day').exists()
+    assert list((tmp_path / '.staging').iterdir()) == []
+    assert (tmp_path / 'crypto' / 'day' / 'SYMA_1day.txt').exists()
+
+def test_lost_lease_stops_before_extracting(tmp_path):
+    meta = MetadataStore(tmp_path / 'meta.db')
+
+    class SlowClient(FrdClient):
+        def _download_archive(self, endpoint, params, record=None):
+            part = super()._download_archive(endpoint, params, record)
+            if params['type'] == 'stock':
+                # another runner takes the lease over while this one downloads
+                MetadataStore(tmp_path / 'meta.db').acquire_lease('stock/day', 'other', ttl=60,
+                                                                  now=time.time() + 120)
+                time.sleep(0.4)
+            return part
+
+    with FakeFrdServer(symbols=2, rows=5) as server:
+        client = SlowClient('id', tmp_path, meta=meta)
+        client.BASE = server.url
+        results = {r.asset_type: r.status for r in
+                   UpdateScheduler(client, meta, leases=JobQueue(meta, owner='me', ttl=0.15)).run_daily()}
+    assert results['stock'] == 'leased'
+    assert meta.get('stock', 'day') is None
+    assert list((tmp_path / 'stock' / 'day').iterdir()) == []
+    assert meta.get_lease('stock/day')[0] == 'other'
@@ -7,11 +7,13 @@ import pytest
 from frd_client.metadata import MetadataStore
 from datetime import date
 
+
 def test_get_empty(tmp_path):
     db = tmp_path / "meta.db"
     store = MetadataStore(db)
     assert store.get("stock", "day") is None
 
+
 @pytest.mark.parametrize("initial,update", [("2025-01-01","2025-02-01"), ("2024-12-31","2025-01-15")])
 def test_set_and_get_update(tmp_path, initial, update):
     db = tmp_path / "meta.db"
@@ -21,4 +23,76 @@ def test_set_and_get_update(tmp_path, initial, update):
     store.set_update("stock", "day", d1)
     assert store.get("stock", "day") == initial
     store.set_update("stock", "day", d2)
-    assert store.get("stock", "day") == update
\ No newline at end of file
+    assert store.get("stock", "day") == update
+
+
+def write_bars(path, stamps):
+    path.write_text(''.join(f'{ts},1,2,0.5,1.5,10\n' for ts in stamps))
+    return path
+
+
+def test_manifest_record_and_lookup(tmp_path):
+    store = MetadataStore(tmp_path / "meta.db")
+    aapl = write_bars(tmp_path / "AAPL_1min.txt", ["2024-01-02 09:30:00", "2024-01-02 16:00:00"])
+    msft = write_bars(tmp_path / "MSFT_1min.txt", ["2024-01-03 09:30:00"])
+    store.on_extract("data_file", {"type": "stock", "timeframe": "1min"}, [aapl, msft])
+    info = store.file_info(aapl)
+    assert info["symbol"] == "AAPL"
+    assert (info["min_ts"], info["max_ts"], info["rows"]) == ("2024-01-02 09:30:00", "2024-01-02 16:00:00", 2)
+    assert info["bytes"] == aapl.stat().st_size
+    found = store.find_files("stock", timeframe="1min", start=date(2024, 1, 3))
+    assert [r["symbol"] for r in found] == ["MSFT"]
+    found = store.find_files("stock", symbols=["AAPL", "MSFT"], end=date(2024, 1, 3))
+    assert [r["symbol"] for r in found] == ["AAPL"]
+
+
+def test_manifest_ignores_meta_archives(tmp_path):
+    store = MetadataStore(tmp_path / "meta.db")
+    f = write_bars(tmp_path / "SPY_meta.txt", ["2024-01-02"])
+    store.on_extract("meta_file", {"type": "etf"}, [f])
+    assert store.file_info(f) is None
+
+
+def test_concurrent_writers(tmp_path):
+    import threading
+    store = MetadataStore(tmp_path / "meta.db", history=True)
+    errors = []
+    def work(i):
+        try:
+            for n in range(20):
+                store.set_update(f"asset{i}", "day", date(2025, 1, n + 1))
+        except Exception as e:
+            errors.append(e)
+    threads = [threading.Thread(target=work, args=(i,)) for i in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert errors == []
+    assert store.get("asset7", "day") == "2025-01-20"
+    assert len(store.get_history("asset3", "day")) == 20
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_batch_commits_once_and_rolls_back(tmp_path):
+    db = tmp_path / "meta.db"
+    store = MetadataStore(db)
+    with store.batch():
+        store.set_update("stock", "day", date(2025, 1, 1))
+        store.set_full("stock", "A", date(2025, 1, 1))
+        assert MetadataStore(db).get("stock", "day") is None   # not yet visible
+    assert MetadataStore(db).get("stock", "full_A") == "2025-01-01"
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            store.set_update("stock", "day", date(2025, 2, 1))
+            raise RuntimeError
+    assert store.get("stock", "day") == "2025-01-01"
+    assert store.get_history("stock", "day") == []
+
+
+def test_thread_connections_closed_when_threads_exit(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+    store = MetadataStore(tmp_path / "meta.db")
+    for round_ in range(10):
+        with ThreadPoolExecutor(4) as pool:
+            list(pool.map(lambda n: store.set_update(f"asset{n}", "day", date(2025, 1, round_ + 1)), range(8)))
+    assert len(store._conns) <= 5
+    assert store.get("asset7", "day") == "2025-01-10"
@@ -0,0 +1,59 @@
+# tests/test_metrics.py
+"""
+test_metrics.py – timers, counters, exporters and the instrumented download path
+"""
+import json
+from datetime import date
+from frd_client.client import FrdClient
+from frd_client.metadata import MetadataStore
+from frd_client.metrics import Metrics
+from frd_client.scheduler import UpdateScheduler
+from benchmarks.fake_server import FakeFrdServer
+
+def test_prometheus_and_trace_export(tmp_path):
+    metrics = Metrics(trace=True)
+    with metrics.timer('request', endpoint='data_file', asset_type=None):
+        pass
+    metrics.count('download_bytes', 10, endpoint='data_file')
+    metrics.count('download_bytes', 5, endpoint='data_file')
+    metrics.write_prometheus(tmp_path / 'frd.prom')
+    text = (tmp_path / 'frd.prom').read_text()
+    assert '# TYPE frd_request_seconds summary' in text
+    assert 'frd_request_seconds_count{endpoint="data_file"} 1' in text
+    assert 'frd_download_bytes_total{endpoint="data_file"} 15' in text
+    metrics.write_trace(tmp_path / 'trace.json')
+    events = json.loads((tmp_path / 'trace.json').read_text())['traceEvents']
+    assert [(e['name'], e['ph'], e['args']) for e in events] == [('request', 'X', {'endpoint': 'data_file'})]
+
+def test_prometheus_families_are_contiguous():
+    metrics = Metrics()
+    for endpoint in ('data_file', 'meta_file'):
+        metrics.observe('request', 0.5, endpoint=endpoint)
+    lines = metrics.prometheus().splitlines()
+    families = [l.split('{')[0].replace('_count', '').replace('_sum', '')
+                for l in lines if not l.startswith('#')]
+    assert families == ['frd_request_seconds'] * 4 + ['frd_request_seconds_max'] * 2
+    assert lines.index('# TYPE frd_request_seconds_max gauge') == 5
+
+def test_scheduler_run_is_measured_and_profiled(tmp_path):
+    metrics = Metrics(profile_dir=tmp_path / 'prof')
+    meta = MetadataStore(tmp_path / 'meta.db', metrics=metrics)
+    meta.set_update('fx', 'day', date(2025, 5, 22))
+    with FakeFrdServer(symbols=2, rows=5) as server:
+        client = FrdClient('id', tmp_path, meta=meta, metrics=metrics)
+        client.BASE = server.url
+        UpdateScheduler(client, meta).run_daily()
+        client.fetch_zip('data_file', {'type': 'crypto', 'period': 'day', 'timeframe': '1day'},
+                         tmp_path / 'crypto' / 'day')
+    timers = {(t['name'], tuple(sorted(t['tags'].items()))): t for t in metrics.snapshot()['timers']}
+    counters = {(c['name'], tuple(sorted(c['tags'].items()))): c['value']
+                for c in metrics.snapshot()['counters']}
+    assert timers[('request', (('asset_type', 'fx'), ('endpoint', 'last_update')))]['count'] == 1
+    assert timers[('handler_download', (('asset_type', 'stock'), ('period', 'day')))]['count'] == 1
+    assert ('handler_download', (('asset_type', 'fx'), ('period', 'day'))) not in timers
+    crypto = (('asset_type', 'crypto'), ('endpoint', 'data_file'), ('period', 'day'))
+    assert timers[('extract', crypto)]['count'] == 1
+    assert counters[('not_modified', crypto)] == 1
+    assert counters[('handler_runs', (('asset_type', 'fx'), ('period', 'day'), ('status', 'skipped')))] == 1
+    assert timers[('sqlite_write', (('table', 'updates'),))]['count'] >= 6
+    assert len(list((tmp_path / 'prof').glob('run_day-*.prof'))) == 1
@@ -0,0 +1,50 @@
+# tests/test_panel.py
+"""
+test_panel.py – clocks and chunked as-of alignment across asset types
+"""
+import numpy as np
+import pandas as pd
+from frd_client.panel import CLOCKS, Clock, Panel
+from frd_client.series import BarSeries, SeriesStore
+
+def bars(times, closes):
+    ts = pd.to_datetime(times).as_unit('ns').asi8
+    c = np.array(closes, dtype='float32')
+    return BarSeries(ts, c, c, c, c, np.ones(len(c), dtype='int64'))
+
+def test_nyse_clock_skips_nights_and_weekends():
+    ticks = CLOCKS['nyse_1min'].ticks('2024-01-05 15:58', '2024-01-08 09:32')   # Fri -> Mon
+    assert [t.strftime('%a %H:%M') for t in ticks] == ['Fri 15:58', 'Fri 15:59', 'Mon 09:30', 'Mon 09:31']
+    assert str(ticks.tz) == 'America/New_York'
+
+def test_asof_alignment_with_tolerance_and_timezones():
+    aapl = bars(['2024-01-02 09:30', '2024-01-02 09:33'], [10, 13])
+    # a source stamped in UTC: 14:31 UTC is 09:31 New York time
+    btc = (bars(['2024-01-02 14:31'], [40000]), 'UTC')
+    panel = Panel({'AAPL': aapl, 'BTC': btc}, fields=['close'], tolerance='2min')
+    df = panel.to_frame(CLOCKS['nyse_1min'], '2024-01-02 09:30', '2024-01-02 09:36')
+    # the 09:30 bar closes at 09:31, so it is not visible at 09:30
+    np.testing.assert_array_equal(df[('close', 'AAPL')], [np.nan, 10, 10, 10, 13, 13])
+    np.testing.assert_array_equal(df[('close', 'BTC')], [np.nan, np.nan, 40000, 40000, 40000, np.nan])
+
+def test_close_labelled_bars_count_from_their_stamp():
+    aapl = bars(['2024-01-02 09:30', '2024-01-02 09:33'], [10, 13])
+    panel = Panel({'AAPL': aapl}, label='close')
+    df = panel.to_frame(CLOCKS['nyse_1min'], '2024-01-02 09:30', '2024-01-02 09:34')
+    assert df[('close', 'AAPL')].tolist() == [10, 10, 10, 13]
+    hourly = Panel({'AAPL': aapl}, bar_width='1hour').align(df.index)
+    assert hourly[('close', 'AAPL')].isna().all()
+
+def test_chunks_cover_range_and_match_single_pass(tmp_path):
+    store = SeriesStore(tmp_path)
+    times = pd.date_range('2024-01-01', periods=3 * 24 * 60, freq='1min')
+    store.write(bars(times, np.arange(len(times))), 'crypto', 'history', '1min', 'BTC')
+    store.write(bars(times[::60], np.arange(72)), 'fx', 'history', '1min', 'EURUSD')
+    panel = Panel.from_store(store, [('crypto', 'BTC'), ('fx', 'EURUSD')], fields=['close', 'volume'],
+                             source_tz='UTC')
+    clock = Clock('5min', tz='UTC')
+    chunks = list(panel.iter_chunks(clock, '2024-01-01', '2024-01-03', chunk='6h'))
+    assert len(chunks) == 8 and all(len(c) == 72 for c in chunks)
+    whole = panel.align(clock.ticks('2024-01-01', '2024-01-03'))
+    pd.testing.assert_frame_equal(pd.concat(chunks), whole)
+    assert whole[('close', 'EURUSD')].iloc[13] == 1.0                    # 01:05 -> 01:00 bar
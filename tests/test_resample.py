@@ -0,0 +1,63 @@
+# tests/test_resample.py
+"""
+test_resample.py – session-aware resampling and incremental derivation
+"""
+import numpy as np
+import pandas as pd
+from frd_client.resample import SESSIONS, Session, resample, update, derive_all
+from frd_client.series import BarSeries, SeriesStore
+
+def minute_bars(start, n, step=1):
+    ts = pd.date_range(start, periods=n, freq=f'{step}min').as_unit('ns').asi8
+    price = np.arange(n, dtype='float32')
+    return BarSeries(ts, price, price + 1, price - 1, price + 0.5, np.ones(n, dtype='int64'))
+
+def test_intraday_buckets_align_to_session_open():
+    bars = minute_bars('2024-01-02 09:00', 60)          # 09:00-09:59
+    out = resample(bars, '30min', SESSIONS['stock'])
+    df = out.to_frame()
+    assert df['timestamp'].tolist() == [pd.Timestamp('2024-01-02 09:30')]
+    row = df.iloc[0]
+    assert (row['open'], row['high'], row['low'], row['close'], row['volume']) == (30, 60, 29, 59.5, 30)
+
+def test_futures_daily_label_crosses_midnight():
+    ts = pd.to_datetime(['2024-01-02 16:30', '2024-01-02 17:30', '2024-01-02 18:30', '2024-01-03 00:30'])
+    price = np.array([1, 2, 3, 4], dtype='float32')
+    bars = BarSeries(ts.as_unit('ns').asi8, price, price, price, price, np.ones(4, dtype='int64'))
+    df = resample(bars, '1day', SESSIONS['futures']).to_frame()
+    # 17:30 falls in the maintenance break; the evening bar opens the next day's session
+    assert df['timestamp'].tolist() == [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-03')]
+    assert df['open'].tolist() == [1, 3] and df['close'].tolist() == [1, 4]
+    assert df['volume'].tolist() == [1, 2]
+
+def test_incremental_update_matches_full_resample(tmp_path):
+    store = SeriesStore(tmp_path)
+    full = minute_bars('2024-01-02 09:30', 3 * 1440)
+    head = full[:1500]
+    head.save(store.path('stock', 'day', '1min', 'AAPL'))
+    derive_all(store, 'stock', 'day', 'AAPL')
+    full.save(store.path('stock', 'day', '1min', 'AAPL'))
+    written = derive_all(store, 'stock', 'day', 'AAPL')
+    assert written['1day'] == 2
+    for tf in ('5min', '30min', '1hour', '1day'):
+        expected = resample(full, tf, SESSIONS['stock'])
+        got = store.open('stock', 'day', tf, 'AAPL')
+        for f in ('timestamp', 'open', 'high', 'low', 'close', 'volume'):
+            np.testing.assert_array_equal(getattr(got, f), getattr(expected, f))
+
+def test_update_keeps_buckets_of_replaced_batches(tmp_path):
+    store = SeriesStore(tmp_path)
+    src = store.path('stock', 'day', '1min', 'AAPL')
+    days = [minute_bars('2024-01-02 09:30', 390), minute_bars('2024-01-03 09:30', 390)]
+    for day in days:
+        # each day's download replaces the period's source series
+        day.save(src)
+        derive_all(store, 'stock', 'day', 'AAPL')
+    got = store.open('stock', 'day', '1day', 'AAPL').to_frame()
+    assert got['timestamp'].tolist() == [pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-03')]
+    assert len(store.open('stock', 'day', '5min', 'AAPL')) == 2 * 78
+
+def test_update_from_empty():
+    bars = minute_bars('2024-01-02 00:00', 10)
+    keep, fresh = update(None, bars, '5min', Session())
+    assert keep == 0 and len(fresh) == 2
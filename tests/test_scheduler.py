@@ -2,10 +2,12 @@
 """
 test_scheduler.py – ensures only handlers needing update are invoked
 """
+import threading, time
 import pytest
 from datetime import date
 from frd_client.scheduler import UpdateScheduler
 
+
 class DummyHandler:
     def __init__(self, asset_type, needs):
         self.asset_type = asset_type
@@ -15,18 +17,61 @@ class DummyHandler:
     def download_update(self, period, **kw): self.downloaded.append(period)
     def last_remote_update(self, full=False): return date.today()
 
+
+class DummyClient: pass
+
+
+def make_sched(**kwargs):
+    meta = type('M',(),{'get':lambda self, a, p: None})()
+    return UpdateScheduler(DummyClient(), meta, **kwargs)
+
+
 @pytest.fixture
 def sched(monkeypatch):
-    class DummyClient: pass
-    meta = type('M',(),{'get':lambda self, a, p: None})()
-    sched = UpdateScheduler(DummyClient(), meta)
+    sched = make_sched()
     sched.handlers = {
         'foo': DummyHandler('foo', True),
         'bar': DummyHandler('bar', False),
     }
     return sched
 
+
 def test_run_daily(sched):
     sched.run_daily()
     assert 'day' in sched.handlers['foo'].downloaded
-    assert sched.handlers['bar'].downloaded == []
\ No newline at end of file
+    assert sched.handlers['bar'].downloaded == []
+
+
+def test_run_weekly_summary(sched):
+    results = {r.asset_type: r for r in sched.run_weekly()}
+    assert results['foo'].status == 'ran'
+    assert results['bar'].status == 'skipped'
+    assert sched.handlers['foo'].downloaded == ['week']
+
+
+def test_concurrent_run_isolates_errors_and_caps_downloads():
+    lock = threading.Lock()
+    active = [0, 0]   # current, peak
+    class SlowHandler(DummyHandler):
+        def download_update(self, period, **kw):
+            with lock:
+                active[0] += 1
+                active[1] = max(active)
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+            super().download_update(period, **kw)
+    class BrokenHandler(DummyHandler):
+        def download_update(self, period, **kw): raise RuntimeError("boom")
+    sched = make_sched(max_workers=4, max_downloads=2)
+    sched.handlers = {t: SlowHandler(t, True) for t in ('a', 'b', 'c', 'd')}
+    sched.handlers['e'] = BrokenHandler('e', True)
+    results = {r.asset_type: r for r in sched.run_daily()}
+    assert all(results[t].status == 'ran' for t in 'abcd')
+    assert results['e'].status == 'failed'
+    assert isinstance(results['e'].error, RuntimeError)
+    assert active[1] <= 2
+
+
+def test_prefetch_remote_updates(sched):
+    assert sched.prefetch_remote_updates() == {'foo': date.today(), 'bar': date.today()}
@@ -0,0 +1,78 @@
+# tests/test_series.py
+"""
+test_series.py – round-trips BarSeries through the memory-mapped layout
+"""
+import numpy as np
+import pandas as pd
+from frd_client.parsing import read_bars
+from frd_client.series import BarSeries, SeriesStore
+
+def write_bars(path, n, volume='10'):
+    path.write_text(''.join(f'2024-01-02 09:{30 + i}:00,{i},{i + 1},{i - 1},{i + 0.5},{volume}\n'
+                            for i in range(n)))
+    return path
+
+def test_save_open_and_slice(tmp_path):
+    store = SeriesStore(tmp_path / 'bars')
+    src = write_bars(tmp_path / 'AAPL_1min.txt', 5)
+    written = store.convert(src, 'stock', 'day', '1min')
+    mapped = store.open('stock', 'day', '1min', 'AAPL')
+    assert isinstance(mapped.close, np.memmap)
+    assert mapped.close.dtype == np.float32 and mapped.volume.dtype == np.int64
+    np.testing.assert_array_equal(mapped.timestamp, written.timestamp)
+    view = mapped.between('2024-01-02 09:31', '2024-01-02 09:33')
+    assert len(view) == 2
+    assert np.shares_memory(view.close, mapped.close)
+    assert view.to_frame()['timestamp'].tolist() == [pd.Timestamp('2024-01-02 09:31'),
+                                                     pd.Timestamp('2024-01-02 09:32')]
+
+def test_save_leaves_open_mappings_intact(tmp_path):
+    store = SeriesStore(tmp_path / 'bars')
+    store.convert(write_bars(tmp_path / 'AAPL_1min.txt', 5), 'stock', 'day', '1min')
+    mapped = store.open('stock', 'day', '1min', 'AAPL')
+    store.convert(write_bars(tmp_path / 'AAPL_1min.txt', 2), 'stock', 'day', '1min')
+    assert mapped.close.tolist() == [0.5, 1.5, 2.5, 3.5, 4.5]
+    assert len(store.open('stock', 'day', '1min', 'AAPL')) == 2
+    assert not list(store.path('stock', 'day', '1min', 'AAPL').glob('.*'))
+
+def test_fractional_volume_and_hook(tmp_path):
+    store = SeriesStore(tmp_path / 'bars')
+    src = write_bars(tmp_path / 'BTC_1min.txt', 2, volume='0.25')
+    store.on_extract('meta_file', {'type': 'crypto', 'period': 'day'}, [src])
+    assert store.symbols('crypto', 'day', '1min') == []
+    store.on_extract('data_file', {'type': 'crypto', 'period': 'day', 'timeframe': '1min'}, [src])
+    assert store.symbols('crypto', 'day', '1min') == ['BTC']
+    assert store.open('crypto', 'day', '1min', 'BTC').volume.dtype == np.float64
+
+def test_history_merge_dedupes_overlapping_batches(tmp_path):
+    store = SeriesStore(tmp_path / 'bars', history=True)
+    params = {'type': 'stock', 'period': 'week', 'timeframe': '1min', 'adjustment': 'adj_split'}
+    store.on_extract('data_file', params, [write_bars(tmp_path / 'AAPL_1min.txt', 5)])
+    # the day batch overlaps the last two bars and revises one of them
+    day = tmp_path / 'AAPL_day.txt'
+    day.write_text('2024-01-02 09:33:00,3,4,2,3.5,10\n'
+                   '2024-01-02 09:34:00,9,9,9,9,99\n'
+                   '2024-01-02 09:35:00,5,6,4,5.5,10\n')
+    assert store.merge(BarSeries.from_frame(read_bars(day)), 'stock', '1min', 'AAPL', 'adj_split') == 3
+    merged = BarSeries.open(store.history_path('stock', '1min', 'AAPL', 'adj_split'))
+    assert len(merged) == 6
+    assert np.all(np.diff(merged.timestamp) > 0)
+    assert merged.volume.tolist() == [10, 10, 10, 10, 99, 10]
+
+def test_write_tail_never_rewrites_mapped_rows(tmp_path):
+    from frd_client.series import write_tail
+    directory = tmp_path / 'AAPL'
+    BarSeries.from_frame(read_bars(write_bars(tmp_path / 'AAPL_1min.txt', 4))).save(directory)
+    mapped = BarSeries.open(directory)
+    inode = (directory / 'close.bin').stat().st_ino
+    tail = BarSeries.from_frame(read_bars(write_bars(tmp_path / 'AAPL_1min.txt', 6)))[4:]
+    write_tail(directory, 4, tail)          # pure append: same files, grown
+    assert (directory / 'close.bin').stat().st_ino == inode
+    revised = BarSeries.from_frame(read_bars(write_bars(tmp_path / 'AAPL_1min.txt', 3, volume='2.5')))[1:]
+    write_tail(directory, 1, revised)       # replaces rows and widens volume: new files
+    assert (directory / 'close.bin').stat().st_ino != inode
+    assert mapped.close.tolist() == [0.5, 1.5, 2.5, 3.5]
+    assert mapped.volume.tolist() == [10, 10, 10, 10]
+    saved = BarSeries.open(directory)
+    assert saved.volume.tolist() == [10.0, 2.5, 2.5]
+    assert saved.close.tolist() == [0.5, 1.5, 2.5]
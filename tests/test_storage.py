@@ -0,0 +1,65 @@
+# tests/test_storage.py
+"""
+test_storage.py – converts extracted bar files to Parquet and reads them back with filters
+"""
+import pytest
+import pandas as pd
+
+pytest.importorskip("pyarrow")
+from frd_client.storage import ParquetStore
+
+def write_bars(path, rows):
+    path.write_text(''.join(f'{ts},1,2,0.5,1.5,{v}\n' for ts, v in rows))
+    return path
+
+@pytest.fixture
+def store(tmp_path):
+    src = tmp_path / 'stock' / 'day'
+    src.mkdir(parents=True)
+    files = [
+        write_bars(src / 'AAPL_1min.txt', [('2023-12-29 15:59:00', 1), ('2024-01-02 09:30:00', 2)]),
+        write_bars(src / 'MSFT_1min.txt', [('2024-01-02 09:30:00', 3)]),
+    ]
+    store = ParquetStore(tmp_path / 'parquet')
+    assert store.ingest('stock', files) == 2
+    return store, files
+
+def test_partition_layout(store):
+    store, _ = store
+    base = store.root / 'asset_type=stock' / 'timeframe=1min' / 'adjustment=none' / 'symbol=AAPL'
+    assert sorted(p.name for p in base.iterdir()) == ['year=2023', 'year=2024']
+    assert [p.name for p in (base / 'year=2024').iterdir()] == ['part-0.parquet']
+
+def test_read_with_projection_and_filters(store):
+    store, _ = store
+    df = store.read('stock', symbols=['AAPL'], start='2024-01-01', columns=['timestamp', 'close', 'symbol'])
+    assert list(df.columns) == ['timestamp', 'close', 'symbol']
+    assert df['timestamp'].tolist() == [pd.Timestamp('2024-01-02 09:30:00')]
+    assert str(df['close'].dtype) == 'float32'
+
+def test_ingest_is_idempotent(store):
+    store, files = store
+    store.ingest('stock', files)
+    assert len(store.read('stock')) == 3
+
+def test_extract_hook_skips_meta_files(tmp_path, store):
+    store, files = store
+    store.on_extract('meta_file', {'type': 'stock'}, files)
+    store.on_extract('data_file', {'type': 'etf'}, files[1:])
+    assert len(store.read('etf')) == 1
+    assert len(store.read()) == 4
+
+def test_overlapping_files_replace_rows(tmp_path, store):
+    store, _ = store
+    week = write_bars(tmp_path / 'AAPL_1min.txt', [('2024-01-02 09:30:00', 20), ('2024-01-02 09:31:00', 30)])
+    store.ingest('stock', [week])
+    df = store.read('stock', symbols=['AAPL'])
+    assert df['volume'].tolist() == [1, 20, 30]
+
+def test_timeframes_and_adjustments_are_kept_apart(tmp_path, store):
+    store, _ = store
+    daily = write_bars(tmp_path / 'AAPL_full_1day_adjsplit.txt', [('2024-01-02 00:00:00', 99)])
+    store.on_extract('data_file', {'type': 'stock', 'timeframe': '1day', 'adjustment': 'adj_split'}, [daily])
+    assert store.read('stock', symbols=['AAPL'], timeframe='1min')['volume'].tolist() == [1, 2]
+    df = store.read('stock', symbols=['AAPL'], timeframe='1day', adjustment='adj_split')
+    assert df['volume'].tolist() == [99]